@@ -0,0 +1,81 @@
+# this script checks data.bulk and data.BulkFrame against a small bulk download archive built in
+# memory, laid out like the API's zipped CSV extracts. It doesn't access the API
+#
+#   python bulk-test.py
+
+import sys
+import io
+import zipfile
+import wbgapi as wb
+
+def csv(*rows):
+    # the API's files have a byte order mark and a trailing comma on every line
+    return '\ufeff' + ''.join([','.join(['"{}"'.format(v) for v in row]) + ',\n' for row in rows])
+
+archive = io.BytesIO()
+with zipfile.ZipFile(archive, 'w') as zf:
+    # footnotes come first, as in full database archives, and must not be mistaken for data
+    zf.writestr('WDIfootnote.csv', csv(
+        ['Country Code', 'Series Code', 'Year', 'DESCRIPTION'],
+        ['BRA', 'SP.POP.TOTL', 'YR2019', 'Estimate'],
+    ))
+    zf.writestr('API_SP.POP.TOTL_DS2_en_csv_v2.csv', csv(
+        ['Data Source', 'World Development Indicators'],
+        [],
+        ['Last Updated Date', '2024-01-01'],
+        [],
+        ['Country Name', 'Country Code', 'Indicator Name', 'Indicator Code', '2018', '2019', '2020'],
+        ['Brazil', 'BRA', 'Population, total', 'SP.POP.TOTL', '209469333', '211049519', ''],
+        ['Argentina', 'ARG', 'Population, total', 'SP.POP.TOTL', '44494502', '44938712', '45376763'],
+        ['World', 'WLD', 'Population, total', 'SP.POP.TOTL', '7.6e9', '7.7e9', '7.8e9'],
+    ))
+    zf.writestr('Metadata_Country_API_SP.POP.TOTL_DS2_en_csv_v2.csv', csv(
+        ['Country Code', 'Region', 'IncomeGroup', 'SpecialNotes', 'TableName'],
+        ['BRA', 'Latin America & Caribbean', 'Upper middle income', 'Fiscal year end: December 31', 'Brazil'],
+        ['ARG', 'Latin America & Caribbean', 'Upper middle income', '', 'Argentina'],
+        ['WLD', '', '', 'World aggregate', 'World'],
+    ))
+    zf.writestr('Metadata_Indicator_API_SP.POP.TOTL_DS2_en_csv_v2.csv', csv(
+        ['INDICATOR_CODE', 'INDICATOR_NAME', 'SOURCE_NOTE', 'SOURCE_ORGANIZATION'],
+        ['SP.POP.TOTL', 'Population, total', 'Total population counts all residents', 'UN'],
+    ))
+
+status = 0
+def check(name, result, expected):
+    global status
+
+    if result != expected:
+        print('{}: expected {}, got {}'.format(name, expected, result))
+        status = 1
+
+rows = list(wb.data.bulk(archive))
+check('rows', len(rows), 9)
+check('first row', rows[0], {'value': 209469333.0, 'economy': 'BRA', 'aggregate': False, 'series': 'SP.POP.TOTL', 'time': 'YR2018'})
+check('blank value', rows[2]['value'], None)
+check('aggregates', sorted(set([row['economy'] for row in rows if row['aggregate']])), ['WLD'])
+
+rows = list(wb.data.bulk(archive, economy='bra', time=[2019, 'YR2020'], skipBlanks=True, labels=True, numericTimeKeys=True))
+check('selection', rows, [{'value': 211049519.0,
+    'economy': {'id': 'BRA', 'value': 'Brazil', 'aggregate': False},
+    'series': {'id': 'SP.POP.TOTL', 'value': 'Population, total'},
+    'time': {'id': 2019, 'value': '2019'}}])
+
+check('skipAggs', sorted(set([row['economy'] for row in wb.data.bulk(archive, skipAggs=True)])), ['ARG', 'BRA'])
+
+# footnotes and metadata notes in the archive are not data
+check('footnotes', [row for row in wb.data.bulk(archive) if row['economy'] not in ['BRA', 'ARG', 'WLD']], [])
+
+df = wb.data.BulkFrame(archive, 'SP.POP.TOTL', skipAggs=True)
+check('frame index', list(df.index), ['ARG', 'BRA'])
+check('frame columns', list(df.columns), ['YR2018', 'YR2019', 'YR2020'])
+check('frame value', df.loc['BRA', 'YR2019'], 211049519.0)
+check('frame blank', df.loc['BRA', 'YR2020'] != df.loc['BRA', 'YR2020'], True)
+
+df = wb.data.BulkFrame(archive, 'SP.POP.TOTL', time=range(2018, 2020), labels=True, numericTimeKeys=True)
+check('labeled frame columns', list(df.columns), ['Country', 2018, 2019])
+check('labeled frame names', df.loc['WLD', 'Country'], 'World')
+
+df = wb.data.BulkFrame(archive, 'SP.POP.TOTL', 'ARG', flat=True)
+check('flat frame', list(df['value']), [44494502.0, 44938712.0, 45376763.0])
+
+sys.exit(status)
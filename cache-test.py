@@ -0,0 +1,91 @@
+# this script checks that the result cache in wbgapi.data streams results that are larger than
+# the cache without holding them in memory, and doesn't cache them, and that cached results are kept
+# separately for each language and endpoint. It doesn't access the API
+#
+#   python cache-test.py
+
+import sys
+import weakref
+import wbgapi as wb
+
+class Row(dict):
+    # a dict that supports weak references, so we can tell whether rows are still held somewhere
+    pass
+
+wb.source._concepts[2] = {
+    'series': {'key': 'series', 'value': 'Series'},
+    'economy': {'key': 'country', 'value': 'Country'},
+    'time': {'key': 'time', 'value': 'Time'},
+}
+wb.time._time_values[2] = {'2020': 'YR2020'}
+wb.economy.aggregate_source = 'snapshot'
+
+size = 100
+refs = []
+pending = []
+
+def refetch(url, keys, params={}, progress=None, **values):
+    for n in range(size * 3):
+        row = Row({'value': float(n), 'variable': [
+            {'concept': 'Series', 'id': 'SP.POP.TOTL', 'value': 'Population'},
+            {'concept': 'Country', 'id': 'E{}'.format(n), 'value': 'Economy {}'.format(n)},
+            {'concept': 'Time', 'id': 'YR2020', 'value': '2020'},
+        ]})
+        refs.append(weakref.ref(row))
+        pending.append(n)
+        yield row
+
+wb.refetch = refetch
+wb.data.cache_size = size
+
+def live():
+    return len([r for r in refs if r() is not None])
+
+status = 0
+streamed = 0
+buffered = 0
+for row in wb.data.fetch('SP.POP.TOTL', time=2020):
+    streamed += 1
+    if len(pending) > streamed:
+        print('rows were read ahead of the consumer')
+        status = 1
+        break
+
+    if streamed == size * 2:
+        # only the current row should still be referenced
+        buffered = live() - 1
+
+print('streamed {} rows, {} buffered, {} cached'.format(streamed, buffered, wb.data._result_cache_count))
+if streamed != size * 3 or buffered > 0 or wb.data._result_cache or wb.data._result_cache_count:
+    status = 1
+
+# results are cached per language and endpoint
+size = 10
+requests = 0
+def refetch(url, keys, params={}, progress=None, **values):
+    global requests
+    requests += 1
+    for n in range(size):
+        yield {'value': float(n), 'variable': [
+            {'concept': 'Series', 'id': 'SP.POP.TOTL', 'value': 'Population'},
+            {'concept': 'Country', 'id': 'E{}'.format(n), 'value': 'Economy {} ({})'.format(n, wb.lang)},
+            {'concept': 'Time', 'id': 'YR2020', 'value': '2020'},
+        ]}
+
+wb.refetch = refetch
+wb.data.cache_size = size * 10
+wb.data.cache_clear()
+for lang in ['en', 'fr', 'en']:
+    wb.lang = lang
+    rows = list(wb.data.fetch('SP.POP.TOTL', time=2020, labels=True))
+    if rows[0]['economy']['value'] != 'Economy 0 ({})'.format(lang):
+        print('labels for {} were served from another language'.format(lang))
+        status = 1
+
+wb.endpoint = 'https://example.com/v2'
+list(wb.data.fetch('SP.POP.TOTL', time=2020))
+if requests != 3:
+    print('expected 3 requests, not {}'.format(requests))
+    status = 1
+
+sys.exit(status)
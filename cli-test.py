@@ -0,0 +1,89 @@
+# this script tests the wbgapi command line exporter's output formats and resume state against a simulated API,
+# so it doesn't access the API. The parquet test requires pyarrow
+#
+#   python cli-test.py
+
+import os
+import sys
+import json
+import time
+import tempfile
+import wbgapi as wb
+from wbgapi import cli
+
+wb.source._concepts[2] = {
+    'series': {'key': 'series', 'value': 'Series'},
+    'economy': {'key': 'country', 'value': 'Country'},
+    'time': {'key': 'time', 'value': 'Time'},
+}
+wb.time._time_values[2] = {str(y): 'YR{}'.format(y) for y in range(2018, 2021)}
+wb.time._time_values[2]['2019Q1'] = '2019Q1'
+wb.economy.aggregate_source = 'snapshot'
+
+def refetch(url, keys, params={}, progress=None, **values):
+    if values['series'] == 'INTERRUPT':
+        raise KeyboardInterrupt()
+
+    if values['series'] == 'SLOW':
+        time.sleep(2)
+
+    for s in values['series'].split(';'):
+        for e in ['BRA', 'WLD']:
+            for t in values['time'].split(';'):
+                yield {'value': None if e == 'WLD' and t == 'YR2020' else 1.5, 'variable': [
+                    {'concept': 'Series', 'id': s, 'value': s},
+                    {'concept': 'Country', 'id': e, 'value': e},
+                    {'concept': 'Time', 'id': t, 'value': t[2:] if t.startswith('YR') else t},
+                ]}
+
+wb.refetch = refetch
+
+def parquet(*args, time='2018:2020'):
+    '''Export to parquet with extra arguments and return the table
+    '''
+
+    import pyarrow.parquet
+
+    path = os.path.join(tempfile.mkdtemp(), 'out.parquet')
+    status = cli.main(['SP.POP.TOTL', 'NY.GDP.PCAP.CD', '--time', time, '--format', 'parquet', '-o', path] + list(args))
+    assert status in (0, None), status
+    return pyarrow.parquet.read_table(path)
+
+status = 0
+
+table = parquet('--numeric-time')
+print(table.schema)
+if str(table.schema.field('time').type) != 'int64' or sorted(set(table.column('time').to_pylist())) != [2018, 2019, 2020]:
+    print('numeric time periods should be stored as integers')
+    status = 1
+
+if table.num_rows != 12 or table.column('value').null_count != 2:
+    print('unexpected parquet contents')
+    status = 1
+
+table = parquet('--labels')
+if str(table.schema.field('time').type) != 'string' or table.column('time').to_pylist()[0] != 'YR2018':
+    print('time keys should be stored as strings')
+    status = 1
+
+# time periods that aren't all annual are stored as strings, even if the first partition's are
+table = parquet('--numeric-time', '--partition-size', '1', time='2018,2019Q1')
+if str(table.schema.field('time').type) != 'string' or table.column('time').to_pylist()[:2] != ['2018', '2019Q1']:
+    print('mixed time periods should be stored as strings')
+    status = 1
+
+# an interruption doesn't wait for partitions in progress, and completed partitions can be resumed
+path = os.path.join(tempfile.mkdtemp(), 'out.csv')
+start = time.time()
+result = cli.main(['SP.POP.TOTL', 'INTERRUPT', 'SLOW', '--partition-size', '1', '--workers', '3', '--resume', '-o', path])
+if result != 130 or time.time() - start > 1:
+    print('interrupted export should return promptly')
+    status = 1
+
+with open(path + '.wbgapi-resume') as fp:
+    if json.load(fp)['done'] != [0]:
+        print('resume state should record the completed partition')
+        status = 1
+
+print('ok' if status == 0 else 'failed')
+sys.exit(status)
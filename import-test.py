@@ -0,0 +1,42 @@
+# this script measures the time it takes to import wbgapi and fails if it exceeds a
+# fixed budget, or if heavy optional dependencies are imported before they are needed
+#
+#   python import-test.py [budget in milliseconds]
+
+import subprocess
+import statistics
+import sys
+import re
+
+budget = float(sys.argv[1]) if len(sys.argv) > 1 else 100  # milliseconds
+runs = 10
+
+# these should load on first use, not when wbgapi is imported
+deferred = ['pandas', 'numpy', 'polars', 'requests', 'yaml', 'tabulate', 'pyarrow']
+
+check = 'import sys, wbgapi; print(" ".join([m for m in {} if m in sys.modules]))'.format(deferred)
+
+times = []
+for n in range(runs):
+    # -X importtime reports cumulative microseconds for each module, excluding interpreter startup
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', check], capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        m = re.match(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*wbgapi$', line)
+        if m:
+            times.append(int(m.group(1)) / 1000)
+
+    loaded = result.stdout.split()
+
+elapsed = statistics.median(times)
+print('import wbgapi: {:.1f} ms (median of {} runs, budget {:.0f} ms)'.format(elapsed, runs, budget))
+
+status = 0
+if loaded:
+    print('imported eagerly: {}'.format(', '.join(loaded)))
+    status = 1
+
+if elapsed > budget:
+    print('over budget')
+    status = 1
+
+sys.exit(status)
@@ -0,0 +1,58 @@
+# this script checks that batched metadata requests (Country-Series, Series-Time and footnotes)
+# still return results for valid keys when other keys in the same request have no metadata, which
+# makes the API return a malformed response. It doesn't access the API
+#
+#   python metadata-test.py
+
+import sys
+import wbgapi as wb
+
+wb.source.has_metadata = lambda db: True
+wb.time._time_values[2] = {'2010': 'YR2010', '2011': 'YR2011'}
+
+# keys containing BAD have no metadata
+requests = []
+def fetch(url, params={}, concepts=False, lang=None, progress=None):
+    requests.append(url)
+    (kind, keys) = url.split('/')[2:4]
+    keys = keys.split(';')
+    if kind != 'series' and any(['BAD' in k for k in keys]):
+        raise wb.APIResponseError(url, 'JSON decoding error')
+
+    concept = {'series': 'Series', 'footnote': 'FootNote'}.get(kind, kind)
+    for k in keys:
+        yield {'id': concept, 'variable': [{'id': k, 'metatype': [{'id': concept, 'value': 'note ' + k}]}]}
+
+wb.fetch = fetch
+wb.api_maxlen = 1000
+
+status = 0
+def check(name, result, expected):
+    global status
+
+    if result != expected:
+        print('{}: expected {}, got {}'.format(name, expected, result))
+        status = 1
+
+series = ['AG.LND', 'BAD.ID', 'NY.GDP', 'SP.POP']
+rows = {row.id: row for row in wb.series.metadata.fetch(series, economies=['BRA', 'ARG'], time=['YR2010', 'YR2011'])}
+check('series', sorted(rows.keys()), series)
+for s in ['AG.LND', 'NY.GDP', 'SP.POP']:
+    check('{} economies'.format(s), rows[s].economies, {'BRA': 'note BRA~' + s, 'ARG': 'note ARG~' + s})
+    check('{} time'.format(s), rows[s].time, {'YR2010': 'note {}~YR2010'.format(s), 'YR2011': 'note {}~YR2011'.format(s)})
+
+check('BAD.ID economies', rows['BAD.ID'].economies, {})
+check('BAD.ID time', rows['BAD.ID'].time, {})
+
+cs = wb.economy.metadata.country_series(['BRA', 'BAD'], ['AG.LND', 'NY.GDP'])
+check('country_series', cs, {('BRA', 'AG.LND'): 'note BRA~AG.LND', ('BRA', 'NY.GDP'): 'note BRA~NY.GDP'})
+
+notes = wb.data.footnotes(['AG.LND', 'BAD.ID'], 'BRA', 2010)
+check('footnotes', notes, {('AG.LND', 'BRA', 'YR2010'): 'note BRA~AG.LND~YR2010'})
+
+# when nothing is wrong, each batch is a single request
+requests.clear()
+wb.data.footnotes(['AG.LND', 'NY.GDP'], ['BRA', 'ARG'], [2010, 2011])
+check('requests', len(requests), 1)
+
+sys.exit(status)
@@ -0,0 +1,54 @@
+# this script checks the local search index (wbgapi.search_index) against a few metadata records,
+# so it doesn't access the API
+#
+#   python search-test.py
+
+import sys
+import wbgapi as wb
+
+def meta(concept, id, name, **fields):
+    m = wb.Metadata(concept, id, name)
+    m.metadata = fields
+    return m
+
+rows = [
+    meta('Series', 'EG.USE.COMM.FO.ZS', 'Fossil fuel energy consumption (% of total)', IndicatorName='Fossil fuel energy consumption (% of total)'),
+    meta('Series', 'EN.ATM.CO2E.FF.ZS', 'CO2 emissions from solid fuel consumption', Longdefinition='Carbon dioxide emissions from burning fossil fuels and the manufacture of cement'),
+    meta('Series', 'GC.TAX.TOTL.CN', 'Tax revenue', Longdefinition='Compulsory transfers to the central government. Taxes on goods and services'),
+    meta('Series', 'SP.POP.TOTL', 'Population, total', Longdefinition='All residents regardless of legal status, in most economies'),
+    meta('Country', 'BRA', 'Brazil', SpecialNotes='Natural gas production is reported by fiscal year'),
+]
+
+index = wb.search_index.Index(rows, db=2)
+wb.search_index._indexes['2'] = index
+
+status = 0
+def check(q, expected, **kwargs):
+    global status
+
+    result = [row.id for row in wb.search2(q, **kwargs)]
+    if sorted(result) != sorted(expected):
+        print('{}: expected {}, got {}'.format(q, expected, result))
+        status = 1
+
+check('fossil fuel', ['EG.USE.COMM.FO.ZS', 'EN.ATM.CO2E.FF.ZS'])
+check('fossil fuels', ['EG.USE.COMM.FO.ZS', 'EN.ATM.CO2E.FF.ZS'])
+check('"fossil fuel"', ['EG.USE.COMM.FO.ZS', 'EN.ATM.CO2E.FF.ZS'])
+check('"fossil fuels" cement', ['EN.ATM.CO2E.FF.ZS'])
+check('emission', ['EN.ATM.CO2E.FF.ZS'])
+check('emissions*', ['EN.ATM.CO2E.FF.ZS'])
+check('fuel*', ['EG.USE.COMM.FO.ZS', 'EN.ATM.CO2E.FF.ZS'])
+check('tax', ['GC.TAX.TOTL.CN'])
+check('service', ['GC.TAX.TOTL.CN'])
+check('economy', ['SP.POP.TOTL'])
+check('status', ['SP.POP.TOTL'])
+check('gas', ['BRA'])
+check('fossil population', [])
+
+# matching words are highlighted as they appear in the text
+result = repr(wb.search('fossil fuel'))
+if '*fuels*' not in result or '*Fossil* *fuel*' not in result:
+    print('search results should highlight plural and singular matches')
+    status = 1
+
+sys.exit(status)
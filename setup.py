@@ -26,5 +26,8 @@ setuptools.setup(
         "Development Status :: 5 - Production/Stable",
     ],
     install_requires=['requests', 'PyYAML', 'tabulate'],
+    entry_points={
+        'console_scripts': ['wbgapi=wbgapi.cli:main'],
+    },
     python_requires='>=3.0',
 )
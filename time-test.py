@@ -0,0 +1,44 @@
+# this script checks wbgapi.time.convert, which converts columns of time keys to integers or
+# pandas periods. It doesn't access the API
+#
+#   python time-test.py
+
+import sys
+import wbgapi as wb
+import pandas as pd
+
+wb.time._time_values[2] = {'2015': 'YR2015', '2016': 'YR2016', '2015Q1': '2015Q1', '2015Q2': '2015Q2'}
+
+status = 0
+
+def check(name, result, expected):
+    global status
+
+    if result != expected:
+        print('{}: expected {}, got {}'.format(name, expected, result))
+        status = 1
+
+check('int', wb.time.convert(['YR2015', 'YR2016', 'YR2015']), [2015, 2016, 2015])
+check('int values', wb.time.convert(['2015', 2016]), [2015, 2016])
+check('int mixed', wb.time.convert(['YR2015', '2015Q1']), [2015, '2015Q1'])
+check('int missing', wb.time.convert(['YR2015', 'YR2016', None, 'YR2015']), [2015, 2016, None, 2015])
+check('int series', wb.time.convert(pd.Series(['YR2016', None, float('nan')])), [2016, None, None])
+check('int empty', wb.time.convert([]), [])
+
+result = wb.time.convert(['2015Q1', '2015Q2', '2015Q1'], 'period')
+check('period', result.tolist(), [pd.Period('2015Q1'), pd.Period('2015Q2'), pd.Period('2015Q1')])
+
+result = wb.time.convert(['YR2015', None, 'YR2016'], 'period')
+check('period missing', [str(p) for p in result], ['2015', 'NaT', '2016'])
+check('period missing freq', result.freqstr[0], 'Y')
+
+result = wb.time.convert([None, None], 'period')
+check('period all missing', [str(p) for p in result], ['NaT', 'NaT'])
+
+try:
+    wb.time.convert(['YR2015', '2015Q1'], 'period')
+    check('mixed frequencies', 'no error', 'ValueError')
+except ValueError:
+    pass
+
+sys.exit(status)
@@ -5,10 +5,10 @@ metadata API with built-in pandas integration
 
 import urllib.parse
 import re
-from functools import reduce
-import requests
+import sys
+from functools import reduce, lru_cache
 import warnings
-from tabulate import tabulate
+from . import utils
 from . import series
 from . import source
 from . import economy
@@ -18,13 +18,21 @@ from . import income
 from . import lending
 from . import topic
 from . import data
+from . import frames
+from . import search_index
+from . import catalog
 
 from .__version__ import __version__
 
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
+# requests and tabulate are imported on first use (see utils.lazy_import)
+requests = utils.lazy_import('requests')
+
+def tabulate(*args, **kwargs):
+    '''Calls tabulate.tabulate, which is imported on first use
+    '''
+
+    from tabulate import tabulate
+    return tabulate(*args, **kwargs)
 
 
 # defaults: these can be changed at runtime with reasonable results
@@ -34,6 +42,8 @@ per_page = 1000          # you can increase this if you start getting 'service u
 db = 2
 proxies = None           # deprecated
 get_options = {}         # additional parameters passed to requests.get
+frame_backend = 'pandas' # library for functions that return data frames: 'pandas' or 'polars' (see wbgapi.frames)
+max_workers = 4          # maximum number of concurrent requests for functions that query the API in parallel
 
 # The maximum URL length is 1500 chars before it reports a server error. Internally we use a smaller
 # number for head room as well as to provide for the query string
@@ -65,6 +75,11 @@ class URLError(Exception):
     pass
 
 class Metadata():
+    # slots keep memory use down for large metadata requests. economies, time and series are set by
+    # series.metadata.fetch() and economy.metadata.fetch(); score by search_index. __dict__ is only
+    # allocated if the caller sets other attributes
+    __slots__ = ('concept', 'id', 'name', 'metadata', 'economies', 'time', 'series', 'score', '__dict__')
+
     def __init__(self,concept,id,name):
         self.concept = concept
         self.id = id
@@ -149,19 +164,13 @@ class MetadataCollection():
         return tabulate(rows, tablefmt=tablefmt, headers=['Concept', 'ID', 'Name'])
         
     def __repr__(self):
-        s = ''
-        
         if len(self.metadata) == 0:
             return 'No match'
 
         if self.brief:
             return self.brief_table('simple')
 
-        for concept in self.metadata.values():
-            for elem in concept:
-                s += elem.repr(q=self.q, padding=self.padding)
-
-        return s
+        return ''.join([elem.repr(q=self.q, padding=self.padding) for concept in self.metadata.values() for elem in concept])
 
     def _repr_html_(self):
         if len(self.metadata) == 0:
@@ -236,7 +245,7 @@ class Coder(dict):
         return economy.coder_report(self)
 
 
-def fetch(url, params={}, concepts=False, lang=None):
+def fetch(url, params={}, concepts=False, lang=None, progress=None):
     '''Iterate over an API request with automatic paging.  The API returns a
     variety of response structures depending on the endpoint. fetch() sniffs
     the response structure and return the most appropriate set of iterated objects.
@@ -250,6 +259,9 @@ def fetch(url, params={}, concepts=False, lang=None):
 
         lang:       preferred language. Pass none to use the global default
 
+        progress:   optional function to call after each page is read. It is passed the response
+                    header, which includes the page, pages, per_page and total elements
+
     Returns:
         a generator object.
 
@@ -283,6 +295,9 @@ def fetch(url, params={}, concepts=False, lang=None):
         if totalRecords is None:
             totalRecords = int(hdr['total'])
 
+        if progress:
+            progress(hdr)
+
         data = _responseObjects(url_, result, wantConcepts=concepts)
         for elem in data:
             yield elem
@@ -316,10 +331,11 @@ def refetch(url, variables, **kwargs):
     concepts = kwargs.get('concepts', False)
     lang     = kwargs.get('lang', None)
     params   = kwargs.get('params', {})
+    progress = kwargs.get('progress', None)
 
     try:
         for url2 in _refetch_url(url, variables[0], variables[1:], **kwargs):
-            for row in fetch(url2, params, concepts, lang):
+            for row in fetch(url2, params, concepts, lang, progress):
                 yield row
     except URLError:
         raise ValueError('{}: parameters exceed the API\'s maximum limit'.format(url))
@@ -357,7 +373,7 @@ def get(url, params={}, concepts=False, lang=None):
     return data[0] if len(data) > 0 else None
 
 
-def metadata(url, variables, concepts='all', **kwargs):
+def metadata(url, variables, concepts='all', fields=None, **kwargs):
     '''Return metadata records
 
     Arguments:
@@ -367,6 +383,9 @@ def metadata(url, variables, concepts='all', **kwargs):
 
         concepts:   Name or list-like of the concepts to return: 'all' for all concepts
 
+        fields:     Name or list-like of the metadata fields to return. None returns all fields; an empty list
+                    returns Metadata objects with only concept, id and name
+
         **kwargs:   Remaining arguments to pass to refetch (must include varables for tokens in url)
 
     Returns:
@@ -379,6 +398,13 @@ def metadata(url, variables, concepts='all', **kwargs):
                 
     Notes:
         Each return from the generator will include a unique concept/id pair and a complete corresponding metadata record
+        (or the requested fields)
+    '''
+
+    return _metadata(refetch(url, variables, concepts=True, **kwargs), concepts, fields)
+
+def _metadata(rows, concepts='all', fields=None):
+    '''Internal function that converts concept-level rows from the API to Metadata objects (see metadata)
     '''
 
     if concepts == 'all':
@@ -386,32 +412,81 @@ def metadata(url, variables, concepts='all', **kwargs):
     elif type(concepts) is str:
         concepts = [concepts]
 
-    def metafield(concept):
-        '''Subroutine for returning individual metadata elements
-        '''
+    if type(fields) is str:
+        fields = [fields]
+
+    if fields is not None:
+        fields = set(fields)
 
-        for var in concept['variable']:
-            id = var['id']
-            for field in var['metatype']:
-                yield (concept['id'], var['id'], var.get('name'), field)
-    
     m = Metadata(None,None,None)
-    for row in refetch(url, variables, concepts=True, **kwargs):
+    for row in rows:
         if concepts and row['id'] not in concepts:
             continue
 
-        for (concept_name,variable_id,variable_name,field) in metafield(row):
-            if concept_name != m.concept or variable_id != m.id:
+        # concept and field names repeat across thousands of objects, so we intern them
+        concept_name = sys.intern(row['id'])
+        for var in row['variable']:
+            # variables without any metadata are skipped
+            if not var['metatype']:
+                continue
+
+            if concept_name != m.concept or var['id'] != m.id:
                 if m.concept:
                     yield m
 
-                m = Metadata(concept_name, variable_id, variable_name)
-            
-            m.metadata[field['id']] = field['value']
+                m = Metadata(concept_name, var['id'], var.get('name'))
+
+            for field in var['metatype']:
+                if fields is None or field['id'] in fields:
+                    m.metadata[sys.intern(field['id'])] = field['value']
 
     if m.concept:
         yield m
 
+def _metadata_chunks(url, var, concepts='all', fields=None, **kwargs):
+    '''Internal function for metadata requests with many keys, e.g., footnotes or Country-Series
+    combinations. Similar to metadata(), except that chunks are requested separately and concurrently.
+    The API returns a malformed response if any key in a chunk has no metadata, so chunks that fail
+    are split and retried until the keys that can't be answered are isolated and skipped.
+
+    Arguments:
+        url:        url with tokens, as per refetch()
+
+        var:        the variable to chunk
+
+        concepts:   Name or list-like of the concepts to return: 'all' for all concepts
+
+        fields:     Name or list-like of the metadata fields to return: None for all fields
+
+        **kwargs:   values for tokens in url
+
+    Returns:
+        a generator that returns Metadata objects
+    '''
+
+    try:
+        chunks = list(_pack_url(url, var, **kwargs))
+    except URLError:
+        raise ValueError('{}: parameters exceed the API\'s maximum limit'.format(url))
+
+    def chunk(keys):
+        kw = kwargs.copy()
+        kw[var] = ';'.join(keys)
+        try:
+            return list(_metadata(fetch(url.format(**kw), concepts=True), concepts, fields))
+        except APIResponseError:
+            if len(keys) == 1:
+                # the API returns malformed responses for non-existent metadata
+                return []
+
+            mid = len(keys) // 2
+            return chunk(keys[:mid]) + chunk(keys[mid:])
+
+    # chunks are requested concurrently (see wbgapi.max_workers)
+    for result in utils.pmap(chunk, chunks):
+        for row in result:
+            yield row
+
 def search(q, footnotes='none', brief=False, padding=80, db=None):
     '''search database metadata and return results as a print-friendly object
 
@@ -438,6 +513,10 @@ def search(q, footnotes='none', brief=False, padding=80, db=None):
         wbgapi.search('fossil fuels')
     '''
 
+    index = search_index.get(db)
+    if index:
+        return index.search(q, footnotes=footnotes, brief=brief, padding=padding)
+
     result = MetadataCollection(brief=brief, q=q, padding=padding)
 
     for row in search2(q, footnotes=footnotes, db=db):
@@ -462,6 +541,9 @@ def search2(q, footnotes='none',  db=None):
         The return of this function is the same as for the metadata() function. The difference
         is that the metadata property contains matching metadata fields and values.
 
+        If a local search index has been built or loaded for the database (see wbgapi.search_index)
+        the index is searched instead of the API, and results are in order of relevance.
+
     Examples:
         for row in wbgapi.search2('fossil fuels'):
             print(row)
@@ -471,6 +553,13 @@ def search2(q, footnotes='none',  db=None):
     if db is None:
         db = globals()['db']
 
+    index = search_index.get(db)
+    if index:
+        for row in index.search2(q, footnotes=footnotes):
+            yield row
+
+        return
+
     try:
         for row in metadata('sources/{source}/search/{q}', ['source'], source=str(db), q=urllib.parse.quote(q, safe='')):
             concept = row.concept.lower()
@@ -568,8 +657,9 @@ def queryParam(arg, concept=None, db=None):
             _concept_mrv_cache[db] = {}
 
         if _concept_mrv_cache[db].get(concept) is None:
-            for row in source.features(concept, db=db):
-                _concept_mrv_cache[db][concept] = row['id']
+            mrv = _fetch_mrv(concept, db)
+            if mrv is not None:
+                _concept_mrv_cache[db][concept] = mrv
 
         arg = _concept_mrv_cache[db].get(concept, '')
         
@@ -583,6 +673,16 @@ def queryParam(arg, concept=None, db=None):
     # this will throw an exception if arg is not iterable, which is what we want it to do
     return ';'.join(map(lambda x:str(x), arg))
 
+def _fetch_mrv(concept, db):
+    '''Internal function that returns the identifier of the last element of a concept (see queryParam)
+    '''
+
+    mrv = None
+    for row in source.features(concept, db=db):
+        mrv = row['id']
+
+    return mrv
+
 def Series(data, key='id', value='value', name=None):
     '''Convert a list-like to a pandas Series object. This core function is
     called by several dimension-specific implementation functions.
@@ -597,7 +697,7 @@ def Series(data, key='id', value='value', name=None):
         name:       Series column name. If None, same as value
 
     Returns:
-        a pandas Series object
+        a pandas Series object, or the equivalent for the current frame backend
     
     Example:
         Generally you are better off calling the Series function for a specific feature
@@ -607,9 +707,8 @@ def Series(data, key='id', value='value', name=None):
         wbgapi.Series(wbgapi.source.features('version', db=57))
     '''
 
-    
-    if pd is None:
-        raise ModuleNotFoundError('you must install pandas to use this feature')
+
+    backend = frames.get()
 
     if name is None:
         name = value
@@ -617,7 +716,12 @@ def Series(data, key='id', value='value', name=None):
     if callable(data):
         data = data()
 
-    return pd.Series({row[key]: row[value] for row in data}, name=name)
+    (keys, values) = ([], [])
+    for row in data:
+        keys.append(row[key])
+        values.append(row[value])
+
+    return backend.series(keys, values, key, name)
 
 def htmlTable(*args, **kwargs):
     '''Generates an HTML table wrapped in a <div class="wbgapi"/> to allow users
@@ -630,22 +734,91 @@ def htmlTable(*args, **kwargs):
 def abbreviate(text, q=None, padding=80):
     '''Returns a shortened version of the text string comprised of the search pattern
     and a specified number of characters on either side. This is used to optimize
-    search results. If the search pattern 
+    search results. If the search pattern isn't found the text is returned unchanged
     '''
 
-    match = None
-    if q and padding is not None:
-        if padding > 0:
-            pattern = r'(?<!\w).{{0,{len}}}{term}.{{0,{len}}}(?!\w)'.format(term=re.escape(q), len=padding)
-            match = re.search(pattern, text, re.IGNORECASE)
-        else:
-            match = re.search(q, text, re.IGNORECASE)
+    if not q or padding is None:
+        return text
+
+    match = _abbreviate_expr(q, padding > 0).search(text)
+    if match is None:
+        return text
+
+    (start, end) = match.span()
+    if padding > 0:
+        # extend the match by up to padding characters on either side, on the same line and without splitting words
+        lo = max(start - padding, text.rfind('\n', 0, start) + 1)
+        hi = text.find('\n', end)
+        hi = min(end + padding, len(text) if hi < 0 else hi)
+        (start, end) = (_word_boundary(text, lo, start, 1), _word_boundary(text, hi, end, -1))
+        while start < match.start() and text[start].isspace():
+            start += 1
+
+        while end > match.end() and text[end-1].isspace():
+            end -= 1
+
+    if end - start + 6 < len(text):
+        return '...' + text[start:end] + '...'
 
-    if match and len(match.group(0)) + 6 < len(text):
-        return '...' + match.group(0) + '...'
-        
     return text
 
+@lru_cache(maxsize=32)
+def _abbreviate_expr(q, literal):
+    '''Internal function that returns the compiled search pattern for abbreviate. Patterns are cached since
+    the same query is applied to every field of every search result
+    '''
+
+    return re.compile(re.escape(q) if literal else q, re.IGNORECASE)
+
+def _word_boundary(text, pos, limit, step):
+    '''Internal function that moves pos toward limit until it isn't inside a word, or past limit
+    in the opposite direction if limit is inside a word
+    '''
+
+    def inside(i):
+        return 0 < i < len(text) and _word_char(text[i-1]) and _word_char(text[i])
+
+    while pos != limit and inside(pos):
+        pos += step
+
+    while inside(pos):
+        pos -= step
+
+    return pos
+
+def _word_char(c):
+
+    return c.isalnum() or c == '_'
+
+def _pack_url(url, var, **kwargs):
+    '''Like _refetch_url, but packs as many semicolon-separated keys into each URL as will fit,
+    which minimizes the number of requests when there are many short keys (e.g., footnotes)
+
+    Returns a generator of key lists, each of which makes a URL that will not exceed the API's
+    maximum string length
+    '''
+
+    kw = kwargs.copy()
+    kw[var] = ''
+    base = len(url.format(**kw))
+
+    keys = []
+    size = base
+    for key in kwargs[var].split(';'):
+        if base + len(key) >= api_maxlen:
+            raise URLError()
+
+        # each additional key adds a semicolon
+        if keys and size + len(key) + 1 >= api_maxlen:
+            yield keys
+            (keys, size) = ([], base)
+
+        size += len(key) + (1 if keys else 0)
+        keys.append(key)
+
+    if keys:
+        yield keys
+
 def _refetch_url(url, var, variables, **kwargs):
     '''Used to chunk potentially very long URLs smaller ones by splitting long arguments
 
@@ -704,3 +877,7 @@ def _refetch_url(url, var, variables, **kwargs):
         kw[var] = elem
         for u2 in _refetch_url(url, variables[0], variables[1:], **kw):
             yield u2
+
+# warm start from the catalog file if one is configured (see wbgapi.catalog)
+if catalog.path:
+    catalog.load()
@@ -0,0 +1,4 @@
+import sys
+from wbgapi.cli import main
+
+sys.exit(main())
@@ -0,0 +1,231 @@
+'''Persistent cache of database catalogs
+
+wbgapi caches database concepts, time periods, metadata flags, the most recent time
+period of each database, economy classifications and the names used by economy.coder in memory, but a new process
+must request them from the API again before its first query. This module saves
+these catalogs to a local file so that later processes can start immediately.
+
+To enable it, set the WBGAPI_CATALOG environment variable to a file name before
+importing wbgapi, or call load() with a file name. Catalogs are loaded from the file
+if it exists, and saved to it when the process exits if they have changed. If the
+file is older than max_age seconds, the catalogs are refreshed from the API in a
+background thread. In the meantime queries use the older catalogs.
+
+Examples:
+    # in the shell
+    export WBGAPI_CATALOG=~/.cache/wbgapi-catalog.json
+
+    # or in python
+    import wbgapi as wb
+    wb.catalog.load('wbgapi-catalog.json')
+'''
+
+import wbgapi as w
+import atexit
+import json
+import os
+import threading
+import time
+
+path = os.environ.get('WBGAPI_CATALOG')                         # catalog file; None disables the catalog
+max_age = int(os.environ.get('WBGAPI_CATALOG_MAX_AGE', 86400))  # seconds before the catalog is refreshed
+
+_format_version = 1
+_loaded = None              # the catalogs as loaded or last saved, to detect changes
+_refresh_thread = None
+_atexit = False
+
+def load(file=None, refresh=True):
+    '''Load catalogs from a file and use it as the catalog file for this process
+
+    Arguments:
+        file:       file name. Pass None to use the catalog path
+
+        refresh:    refresh the catalogs in a background thread if the file is older than max_age
+
+    Returns:
+        True if the catalogs were loaded, False if the file doesn't exist or can't be used
+    '''
+
+    global path, _loaded, _atexit
+
+    if file is not None:
+        path = file
+
+    if path is None:
+        raise ValueError('no catalog file')
+
+    path = os.path.expanduser(path)
+    if not _atexit:
+        atexit.register(_save_changes)
+        _atexit = True
+
+    try:
+        with open(path, 'r') as fp:
+            data = json.load(fp)
+    except (OSError, ValueError):
+        return False
+
+    if data.get('version') != _format_version or data.get('endpoint') != w.endpoint:
+        return False
+
+    restore(data)
+    _loaded = snapshot()
+    if refresh and time.time() - data.get('saved', 0) > max_age:
+        refresh_async()
+
+    return True
+
+def save(file=None):
+    '''Save the current catalogs to a file
+
+    Arguments:
+        file:       file name. Pass None to use the catalog path
+    '''
+
+    global _loaded
+
+    if file is None:
+        file = path
+
+    if file is None:
+        raise ValueError('no catalog file')
+
+    data = snapshot()
+    data.update({'version': _format_version, 'endpoint': w.endpoint, 'saved': time.time()})
+
+    # write to a temporary file first so that other processes never read a partial file
+    file = os.path.expanduser(file)
+    tmp = '{}.{}.tmp'.format(file, os.getpid())
+    with open(tmp, 'w') as fp:
+        json.dump(data, fp)
+
+    os.replace(tmp, file)
+    _loaded = snapshot()
+
+def refresh():
+    '''Refresh all cached catalogs from the API. Fresh catalogs replace the old ones as they are
+    retrieved, so queries in other threads can continue in the meantime
+    '''
+
+    for db in list(w.source._concepts.keys()):
+        w.source._concepts[db] = w.source._fetch_concepts(db)
+
+    for db in list(w.source._metadata_flags.keys()):
+        w.source._metadata_flags[db] = w.source._fetch_metadata_flag(db)
+
+    for db in list(w.time._time_values.keys()):
+        w.time._time_values[db] = w.time._fetch_periods(db)
+
+    for db,concepts in list(w._concept_mrv_cache.items()):
+        mrv = {k: w._fetch_mrv(k, db) for k in concepts.keys()}
+        w._concept_mrv_cache[db] = {k:v for k,v in mrv.items() if v is not None}
+
+    def economies(lang, classifications):
+        (localized, iso2Codes, class_data, aggs) = w.economy._fetch_caches(lang, classifications)
+        w.economy._iso2Codes.update(iso2Codes)
+        if class_data is not None:
+            w.economy._class_data = class_data
+            w.economy._aggs = aggs
+
+        w.economy._localized_metadata[lang] = localized
+
+    # classifications are the same in every language, so they're only refreshed with the first one
+    langs = list(w.economy._localized_metadata.keys())
+    w.utils.pmap(lambda lang: economies(lang, lang == langs[0]), langs)
+    w.economy._member_fallback.clear()
+    w.topic._members.clear()
+
+    # the country name coder only needs refreshing if it's in use
+    if w.economy_coder._matcher is not None:
+        w.economy_coder.refresh()
+
+def refresh_async():
+    '''Refresh catalogs in a background thread, then save them to the catalog file
+
+    Returns:
+        the thread object
+    '''
+
+    global _refresh_thread
+
+    def run():
+        try:
+            refresh()
+            if path:
+                save()
+        except Exception:
+            # keep using the older catalogs if the API is unavailable
+            pass
+
+    if _refresh_thread is None or not _refresh_thread.is_alive():
+        _refresh_thread = threading.Thread(target=run, name='wbgapi-catalog-refresh', daemon=True)
+        _refresh_thread.start()
+
+    return _refresh_thread
+
+def snapshot():
+    '''Return the cached catalogs as a JSON-serializable dict
+    '''
+
+    def keyed(d):
+        return {str(k): v for k,v in d.items()}
+
+    return {
+        'concepts': keyed(w.source._concepts),
+        'metadata_flags': keyed(w.source._metadata_flags),
+        'periods': keyed(w.time._time_values),
+        'mrv': keyed(w._concept_mrv_cache),
+        'economy': {
+            'localized': w.economy._localized_metadata,
+            'iso2': w.economy._iso2Codes,
+            'class_data': w.economy._class_data,
+            'aggregates': sorted(w.economy._aggs) if w.economy._aggs is not None else None,
+        },
+        # coder names are only worth saving if they are newer than the bundled snapshot
+        'coder': w.economy_coder._api_names(),
+    }
+
+def restore(data):
+    '''Restore catalogs from a dict returned by snapshot(). Catalogs already in memory take precedence
+    '''
+
+    def db(k):
+        # databases are usually referenced by number
+        return int(k) if k.isdigit() else k
+
+    for k,v in data['concepts'].items():
+        w.source._concepts.setdefault(db(k), v)
+
+    for k,v in data['metadata_flags'].items():
+        w.source._metadata_flags.setdefault(db(k), v)
+
+    for k,v in data['periods'].items():
+        w.time._time_values.setdefault(db(k), v)
+
+    for k,v in data['mrv'].items():
+        w._concept_mrv_cache.setdefault(db(k), v)
+
+    e = data['economy']
+    if e['class_data'] is not None and w.economy._class_data is None:
+        w.economy._class_data = e['class_data']
+        w.economy._aggs = set(e['aggregates'])
+        for k,v in e['iso2'].items():
+            w.economy._iso2Codes.setdefault(k, v)
+
+        for k,v in e['localized'].items():
+            w.economy._localized_metadata.setdefault(k, v)
+
+    if data.get('coder'):
+        w.economy_coder._restore(data['coder'])
+
+def _save_changes():
+    '''Save catalogs at exit if they have changed
+    '''
+
+    if path and snapshot() != _loaded:
+        try:
+            save()
+        except (OSError, RuntimeError):
+            # RuntimeError if a background refresh is still changing the catalogs
+            pass
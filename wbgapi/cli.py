@@ -0,0 +1,373 @@
+'''Command line interface for exporting data
+
+Queries are split into partitions along the series dimension, which are requested
+concurrently and written in order to CSV, NDJSON or Parquet as each one completes,
+so memory use is bounded by the number of partitions in progress. Output can be
+resumed if an export to a file is interrupted.
+
+Examples:
+    # population for all economies as CSV
+    wbgapi SP.POP.TOTL > population.csv
+
+    # most recent values for all WDI series, skipping aggregates, with progress
+    wbgapi all --mrnev 1 --skip-aggs --format parquet --output wdi.parquet --progress
+
+    # debt data for 2010-2019 from IDS. Re-run the same command to resume if interrupted
+    wbgapi all --db 6 --time 2010:2019 --format ndjson --output ids.json --resume
+'''
+
+import wbgapi as w
+import argparse
+import collections
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def main(argv=None):
+    '''Entry point for the wbgapi command
+
+    Arguments:
+        argv:       command line arguments. Pass None to use sys.argv
+
+    Returns:
+        exit status
+    '''
+
+    parser = argparse.ArgumentParser(prog='wbgapi', description='Export data from the World Bank API', epilog='Values may be space or comma separated. Time ranges can be written as START:END (inclusive)')
+    parser.add_argument('series', nargs='+', help='series identifiers, or "all"')
+    parser.add_argument('--db', default=None, help='database (default: {})'.format(w.db))
+    parser.add_argument('--economy', nargs='+', default=['all'], help='economy identifiers (default: all)')
+    parser.add_argument('--time', nargs='+', default=['all'], help='time identifiers or values (default: all)')
+    parser.add_argument('--dimension', nargs=2, action='append', default=[], metavar=('NAME', 'VALUES'), help='extra database dimension, e.g., --dimension version 201904')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--mrv', type=int, help='number of most recent values')
+    group.add_argument('--mrnev', type=int, help='number of most recent non-empty values')
+    parser.add_argument('--skip-aggs', action='store_true', help='skip aggregates')
+    parser.add_argument('--skip-blanks', action='store_true', help='skip empty observations')
+    parser.add_argument('--labels', action='store_true', help='include dimension names')
+    parser.add_argument('--numeric-time', action='store_true', help='write annual time periods as numbers (2015 instead of YR2015)')
+    parser.add_argument('--format', choices=['csv', 'ndjson', 'parquet'], default='csv', help='output format (default: csv)')
+    parser.add_argument('--output', '-o', default=None, help='output file (default: stdout)')
+    parser.add_argument('--workers', type=int, default=w.max_workers, help='concurrent requests (default: {})'.format(w.max_workers))
+    parser.add_argument('--partition-size', type=int, default=None, help='series per partition (default: as many as fit in a request)')
+    parser.add_argument('--resume', action='store_true', help='resume an interrupted export to --output')
+    parser.add_argument('--progress', action='store_true', help='show progress on stderr')
+    args = parser.parse_args(argv)
+
+    if args.resume and (args.output is None or args.format == 'parquet'):
+        parser.error('--resume requires --output and csv or ndjson format')
+
+    if args.db is not None:
+        w.db = int(args.db) if args.db.isdigit() else args.db
+
+    economy = _values(args.economy)
+    dimensions = {k: _values([v]) for k,v in args.dimension}
+    query = dict(series=_values(args.series), economy=economy, time=_values(args.time), mrv=args.mrv, mrnev=args.mrnev,
+        skipAggs=args.skip_aggs, skipBlanks=args.skip_blanks, labels=args.labels, numericTimeKeys=args.numeric_time, db=w.db, **dimensions)
+
+    series = w.queryParam(query.pop('series'), 'series')
+    if series == 'all':
+        series = ';'.join([row['id'] for row in w.source.features('series', 'all')])
+
+    if args.partition_size:
+        series = series.split(';')
+        partitions = [series[n:n+args.partition_size] for n in range(0, len(series), args.partition_size)]
+    else:
+        partitions = [x.split(';') for x in w._refetch_url('{x}', 'x', [], x=series)]
+
+    state = _ResumeState(args.output, dict(query, series=partitions, format=args.format)) if args.resume else None
+    done = state.done if state else set()
+
+    writer = _writers[args.format](args.output, state.offset if state else None)
+    if args.numeric_time and args.format == 'parquet':
+        # every partition is written with the same schema, so time is numeric only if all of the query's periods are
+        writer.numeric_time = all([type(v) is int for v in w.time.convert(w.utils.ids(query['time'], 'time'))])
+
+    progress = _Progress(len(partitions), len(done)) if args.progress else None
+
+    def rows(n):
+        callback = (lambda hdr: progress.update(n, hdr)) if progress else None
+        return list(w.data.fetch(partitions[n], progress=callback, **query))
+
+    try:
+        # keep at most 'workers' partitions in memory: results are written in order as they complete
+        pending = collections.deque()
+        todo = iter([n for n in range(len(partitions)) if n not in done])
+        executor = ThreadPoolExecutor(max_workers=max(args.workers, 1))
+        try:
+            for n in todo:
+                pending.append((n, executor.submit(rows, n)))
+                if len(pending) >= args.workers:
+                    _write(writer, pending.popleft(), state, progress)
+
+            while pending:
+                _write(writer, pending.popleft(), state, progress)
+
+        finally:
+            # if interrupted, don't wait for partitions that won't be written
+            for (_, future) in pending:
+                future.cancel()
+
+            executor.shutdown(wait=False)
+
+    except KeyboardInterrupt:
+        if progress:
+            progress.finish()
+
+        sys.stderr.write('Interrupted\n')
+        return 130
+
+    finally:
+        writer.close()
+
+    if progress:
+        progress.finish()
+
+    if state:
+        state.remove()
+
+    return 0
+
+def _values(args):
+    '''Convert command line values to a list, expanding commas and START:END ranges
+    '''
+
+    values = []
+    for arg in args:
+        for x in arg.split(','):
+            x = x.strip()
+            if ':' in x and all([v.isdigit() for v in x.split(':')]):
+                (start, end) = map(int, x.split(':'))
+                values.extend(range(start, end+1))
+            elif x:
+                values.append(x)
+
+    return values[0] if len(values) == 1 else values
+
+def _write(writer, item, state, progress):
+
+    (n, future) = item
+    rows = future.result()
+    writer.write(rows)
+    if state:
+        state.update(n, writer.tell())
+
+    if progress:
+        progress.complete(n)
+
+def _flatten(row):
+    '''Flatten labeled rows: {'economy': {'id': 'BRA', 'value': 'Brazil'}} becomes economy and economy_label
+    '''
+
+    x = {}
+    for k,v in row.items():
+        if type(v) is dict:
+            x[k] = v['id']
+            x[k + '_label'] = v['value']
+            if 'aggregate' in v:
+                x['aggregate'] = v['aggregate']
+        else:
+            x[k] = v
+
+    return x
+
+class _Writer():
+    '''Base class for output formats. Output is appended at offset if resuming
+    '''
+
+    mode = 'w'
+
+    def __init__(self, path, offset=None):
+        if path is None:
+            self.fp = sys.stdout.buffer if 'b' in self.mode else sys.stdout
+            self.closefp = False
+        else:
+            if offset is not None:
+                # discard anything written after the last completed partition
+                with open(path, 'a') as fp:
+                    fp.truncate(offset)
+
+            self.fp = open(path, self.mode.replace('w', 'a') if offset is not None else self.mode, newline='' if 'b' not in self.mode else None)
+            self.closefp = True
+
+        self.resumed = offset is not None and offset > 0
+
+    def tell(self):
+        self.fp.flush()
+        return self.fp.tell()
+
+    def close(self):
+        if self.closefp:
+            self.fp.close()
+        else:
+            self.fp.flush()
+
+class _CSVWriter(_Writer):
+
+    def __init__(self, path, offset=None):
+        super(_CSVWriter, self).__init__(path, offset)
+        self.writer = None
+
+    def write(self, rows):
+        for row in rows:
+            row = _flatten(row)
+            if self.writer is None:
+                self.writer = csv.DictWriter(self.fp, fieldnames=list(row.keys()))
+                if not self.resumed:
+                    self.writer.writeheader()
+
+            self.writer.writerow(row)
+
+class _NDJSONWriter(_Writer):
+
+    def write(self, rows):
+        for row in rows:
+            self.fp.write(json.dumps(_flatten(row)) + '\n')
+
+class _ParquetWriter(_Writer):
+
+    mode = 'wb'
+
+    def __init__(self, path, offset=None):
+        import pyarrow
+        import pyarrow.parquet
+
+        super(_ParquetWriter, self).__init__(path, offset)
+        self.pa = pyarrow
+        self.writer = None
+        self.numeric_time = False
+
+    def write(self, rows):
+        if len(rows) == 0:
+            return
+
+        rows = [_flatten(row) for row in rows]
+        if self.writer is None:
+            # values are floats and the aggregate flag is boolean. Everything else is text, except numeric time periods
+            fields = []
+            for k in rows[0].keys():
+                if k == 'value':
+                    fields.append((k, self.pa.float64()))
+                elif k == 'aggregate':
+                    fields.append((k, self.pa.bool_()))
+                elif k == 'time' and self.numeric_time:
+                    # --numeric-time, and all time periods are annual
+                    fields.append((k, self.pa.int64()))
+                else:
+                    fields.append((k, self.pa.string()))
+
+            self.schema = self.pa.schema(fields)
+            self.writer = self.pa.parquet.ParquetWriter(self.fp, self.schema)
+
+        # each partition becomes a row group
+        data = {}
+        for field in self.schema:
+            values = [row.get(field.name) for row in rows]
+            if field.type == self.pa.string():
+                values = [None if v is None else str(v) for v in values]
+            elif field.type == self.pa.int64():
+                values = [None if v is None else int(v) for v in values]
+            elif field.name == 'value':
+                values = [None if v is None else float(v) for v in values]
+
+            data[field.name] = values
+
+        self.writer.write_table(self.pa.table(data, schema=self.schema))
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+        super(_ParquetWriter, self).close()
+
+_writers = {'csv': _CSVWriter, 'ndjson': _NDJSONWriter, 'parquet': _ParquetWriter}
+
+class _ResumeState():
+    '''Tracks completed partitions in a file next to the output so that an export can be resumed
+    '''
+
+    version = 1
+
+    def __init__(self, output, query):
+        self.path = output + '.wbgapi-resume'
+        self.query = json.loads(json.dumps(query, default=str))
+        self.done = set()
+        self.offset = None
+
+        if os.path.exists(self.path) and os.path.exists(output):
+            with open(self.path, 'r') as fp:
+                state = json.load(fp)
+
+            if state.get('version') == self.version and state.get('query') == self.query:
+                self.done = set(state['done'])
+                self.offset = state['offset']
+            else:
+                sys.stderr.write('{}: query has changed; starting over\n'.format(output))
+
+    def update(self, n, offset):
+        self.done.add(n)
+        self.offset = offset
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as fp:
+            json.dump({'version': self.version, 'query': self.query, 'done': sorted(self.done), 'offset': offset}, fp)
+
+        os.replace(tmp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class _Progress():
+    '''Displays progress and an estimated time to completion on stderr, based on the paging
+    headers of the partitions in progress
+    '''
+
+    def __init__(self, partitions, done=0):
+        self.partitions = partitions
+        self.done = done
+        self.skipped = done
+        self.totals = {}    # total records in each partition that has started
+        self.read = {}      # records read in each partition
+        self.start = time.time()
+        self.lock = threading.Lock()
+
+    def update(self, n, hdr):
+        with self.lock:
+            self.totals[n] = int(hdr['total'])
+            self.read[n] = min(int(hdr['page']) * int(hdr['per_page']), self.totals[n])
+            self.display()
+
+    def complete(self, n):
+        with self.lock:
+            self.done += 1
+            self.display()
+
+    def display(self):
+
+        read = sum(self.read.values())
+        if self.totals:
+            # estimate the size of partitions that haven't started from the ones that have
+            remaining = self.partitions - self.skipped - len(self.totals)
+            total = sum(self.totals.values()) + remaining * sum(self.totals.values()) / len(self.totals)
+        else:
+            total = 0
+
+        elapsed = time.time() - self.start
+        eta = '--:--:--'
+        if read > 0 and total >= read:
+            eta = _hms(elapsed * (total - read) / read)
+
+        sys.stderr.write('\rpartitions {}/{}  records {:,}/{:,}  elapsed {}  eta {} '.format(self.done, self.partitions, read, int(total), _hms(elapsed), eta))
+        sys.stderr.flush()
+
+    def finish(self):
+        sys.stderr.write('\n')
+
+def _hms(seconds):
+
+    seconds = int(seconds)
+    return '{}:{:02d}:{:02d}'.format(seconds // 3600, (seconds % 3600) // 60, seconds % 60)
@@ -3,14 +3,28 @@
 '''
 
 import wbgapi as w
-try:
-    import numpy as np
-    import pandas as pd
-except ImportError:
-    np = None
-    pd = None
-
-def fetch(series, economy='all', time='all', mrv=None, mrnev=None, skipBlanks=False, labels=False, skipAggs=False, numericTimeKeys=False, params={}, db=None, **dimensions):
+import csv
+import io
+import builtins
+from collections import OrderedDict
+import threading
+import zipfile
+from . import utils
+
+pd = utils.lazy_import('pandas')
+
+# Maximum number of observations to keep in the result cache. When enabled, fetch() stores the results
+# of each query so that subsequent queries for the same or a subset of the data, including mrv and mrnev
+# requests for full time series, can be answered locally. Least recently used results are evicted
+# first. 0 disables the cache
+cache_size = 0
+
+# cached results keyed by endpoint, language, query and selection: see _cache_lookup
+_result_cache = OrderedDict()
+_result_cache_count = 0
+_result_cache_lock = threading.Lock()
+
+def fetch(series, economy='all', time='all', mrv=None, mrnev=None, skipBlanks=False, labels=False, skipAggs=False, numericTimeKeys=False, params={}, db=None, progress=None, **dimensions):
     '''Retrieve rows of data for the current database
 
     Arguments:
@@ -35,6 +49,8 @@ def fetch(series, economy='all', time='all', mrv=None, mrnev=None, skipBlanks=Fa
 
         params:             extra query parameters to pass to the API
 
+        progress:           optional function to call after each page is read from the API (see wbgapi.fetch)
+
         dimensions:         extra dimensions, database specific (e.g., version)
 
     Returns:
@@ -87,9 +103,34 @@ def fetch(series, economy='all', time='all', mrv=None, mrnev=None, skipBlanks=Fa
         url += '/{}/{}'.format(concepts[k]['key'], '{' + k + '}')
         values[k] = w.queryParam(v, concept=k, db=db)
 
-    aggs = w.economy.aggregates()
-
-    for row in w.refetch(url, keys, params=params_, **values):
+    # aggregates only apply to databases coded by country, and aren't needed until rows arrive. If they
+    # aren't cached yet they are resolved in the background while the data are requested
+    if w.economy._country_coded(concepts):
+        aggs = None
+        w.economy._prefetch_aggregates()
+    else:
+        aggs = set()
+
+    rows = None
+    cacheable = cache_size > 0 and 'mrv' not in params and 'mrnev' not in params
+    if cacheable:
+        # labels depend on the language, and rows on the server
+        cache_key = (w.endpoint, w.lang, str(db), _cache_params(params))
+        selection = _cache_selection(keys, values)
+        if not mrv and not mrnev:
+            rows = _cache_lookup(cache_key, selection, concept_keys)
+        elif values['time'] == 'all':
+            # most recent values can be calculated from a cached full time series
+            rows = _cache_lookup(cache_key, selection, concept_keys)
+            if rows is not None:
+                rows = _most_recent(rows, concept_keys, mrv, mrnev)
+
+    if rows is None:
+        rows = w.refetch(url, keys, params=params_, progress=progress, **values)
+        if cacheable and not mrv and not mrnev:
+            rows = _cache_rows(cache_key, selection, rows, concept_keys)
+
+    for row in rows:
         if skipBlanks and row['value'] is None:
             continue
 
@@ -98,14 +139,18 @@ def fetch(series, economy='all', time='all', mrv=None, mrnev=None, skipBlanks=Fa
         x = {'value': row['value']}
         for elem in row['variable']:
             key = concept_keys[elem['concept'].lower()]
-            if key == 'economy' and skipAggs and elem['id'] in aggs:
-                skip = True
-                break
+            if key == 'economy':
+                if aggs is None:
+                    aggs = w.economy.aggregates()
+
+                if skipAggs and elem['id'] in aggs:
+                    skip = True
+                    break
 
             if not skip:
                 if labels:
-                    del(elem['concept'])
-                    x[key] = elem
+                    # copy so that cached rows are left intact
+                    x[key] = {k:v for k,v in elem.items() if k != 'concept'}
                     if key == 'economy':
                         x[key]['aggregate'] = elem['id'] in aggs
                     elif key == 'time' and numericTimeKeys and elem['value'].isdigit():
@@ -152,22 +197,10 @@ def FlatFrame(series, economy='all', time='all', mrv=None, mrnev=None, skipBlank
         values in the time column are numeric if possible (2015 not 'YR2015')
     '''
 
-    if pd is None:
-        raise ModuleNotFoundError('you must install pandas to use this feature')
-
-    key = 'value' if labels else 'id'
-    df = None
+    w.frames.require()
 
     # we set numericTimeKeys=True so that time values will always be numeric if possible
-    for row in fetch(series, economy, time, mrv=mrv, mrnev=mrnev, skipBlanks=skipBlanks, labels=True, numericTimeKeys=True, skipAggs=skipAggs, params=params, db=db, **dimensions):
-        if df is None:
-            # this assumes that the API returns the same object structure in every row, so we can use the first as a template
-            columns = row.keys()
-            df = pd.DataFrame(columns=columns)
-
-        df.loc[len(df)] = [row[i][key] if type(row[i]) is dict else row[i] for i in columns]
-
-    return df
+    return _FlatFrame(fetch(series, economy, time, mrv=mrv, mrnev=mrnev, skipBlanks=skipBlanks, labels=True, skipAggs=skipAggs, params=params, db=db, **dimensions), labels, numericTimeKeys=True, db=db)
 
 def DataFrame(series, economy='all', time='all', index=None, columns=None, mrv=None, mrnev=None, skipBlanks=False, labels=False, skipAggs=False, numericTimeKeys=False, timeColumns=False, params={}, db=None, **dimensions):
     '''Retrieve a 2-dimensional pandas dataframe. 
@@ -197,7 +230,8 @@ def DataFrame(series, economy='all', time='all', index=None, columns=None, mrv=N
 
         skipAggs:           skip aggregates
 
-        numericTimeKeys:    store the time object by value (e.g., 2014) instead of key ('YR2014') if value is numeric
+        numericTimeKeys:    store the time object by value (e.g., 2014) instead of key ('YR2014') if value is numeric.
+                            Pass 'period' to convert time keys to pandas periods (annual, quarterly or monthly)
 
         timeColumns:        add extra columns to show the time dimension for each series/economy
                             If 'auto' then the function will guess based on other parameters
@@ -227,15 +261,895 @@ def DataFrame(series, economy='all', time='all', index=None, columns=None, mrv=N
         at some point, so that mrv behavior is more intuitive for data discovery
     '''
 
-    def frame(index):
+    w.frames.require()
+
+    dimensions_ = {'series': series, 'economy': economy, 'time': time}
+    dimensions_.update(dimensions)
+    concepts = w.source.concepts(db)
+    index, columns, timeColumns = _axes(concepts.keys(), dimensions_, index, columns, mrv, mrnev, timeColumns)
+
+    return _DataFrame(fetch(series, economy, time, mrv=mrv, mrnev=mrnev, skipBlanks=skipBlanks, labels=True, skipAggs=skipAggs, params=params, db=db, **dimensions),
+        index, columns, labels, timeColumns, concepts, numericTimeKeys=numericTimeKeys, db=db)
+
+def multifetch(series, economy='all', time='all', db=None, mrv=None, mrnev=None, skipBlanks=False, labels=False, skipAggs=False, numericTimeKeys=False, params={}, **dimensions):
+    '''Retrieve rows of data from several databases concurrently
+
+    Arguments:
+        db:                 a database identifier or list-like of databases, e.g., [2, 6]
+
+        All other arguments are the same as for fetch(). Extra dimensions must exist in each database
+
+    Returns:
+        A generator object. Rows are the same as for fetch() with an additional 'db' element. Rows
+        are returned in the order of the databases requested
+
+    Example:
+        # external debt data from WDI and IDS
+        for elem in wbgapi.data.multifetch('DT.DOD.DECT.CD', 'BRA', range(2010,2020), db=[2, 6]):
+            print(elem['db'], elem['time'], elem['value'])
+
+    Notes:
+        Requests are sent concurrently, up to wbgapi.max_workers at a time. Each database's concept names
+        are mapped to the same economy, series and time dimensions as in fetch().
+    '''
+
+    dbs = _dblist(db)
 
-        if len(index) > 1:
-            i = [[]] * len(index)
-            return pd.DataFrame(index=pd.MultiIndex(levels=i, codes=i, names=tuple(index)))
+    def rows(db):
+        return builtins.list(fetch(series, economy, time, mrv=mrv, mrnev=mrnev, skipBlanks=skipBlanks, labels=labels, skipAggs=skipAggs,
+            numericTimeKeys=numericTimeKeys, params=params, db=db, **dimensions))
 
-        df = pd.DataFrame()
-        df.index.name = index[0]
-        return df
+    for db_,result in zip(dbs, w.utils.pmap(rows, dbs)):
+        for row in result:
+            x = {'db': db_}
+            x.update(row)
+            yield x
+
+def MultiFrame(series, economy='all', time='all', db=None, index=None, columns=None, mrv=None, mrnev=None, skipBlanks=False, labels=False, skipAggs=False, numericTimeKeys=False, timeColumns=False, params={}, **dimensions):
+    '''Retrieve a 2-dimensional pandas dataframe from several databases concurrently
+
+    Arguments:
+        db:                 a database identifier or list-like of databases, e.g., [2, 6]
+
+        All other arguments are the same as for DataFrame(). Extra dimensions must exist in each database
+
+    Returns:
+        a pandas DataFrame. The database is the outermost level of the index
+
+    Example:
+        # compare external debt stocks in WDI and IDS
+        wbgapi.data.MultiFrame('DT.DOD.DECT.CD', ['BRA', 'ARG'], range(2010,2020), db=[2, 6])
+
+    Notes:
+        If index and columns aren't specified, they are inferred from the dimensions that all of the databases share
+    '''
+
+    w.frames.require()
+
+    dbs = _dblist(db)
+
+    # infer the axes once, so that all databases return the same structure
+    concepts = [w.source.concepts(db_).keys() for db_ in dbs]
+    concepts = builtins.list(filter(lambda x: all([x in c for c in concepts]), concepts[0]))
+    dimensions_ = {'series': series, 'economy': economy, 'time': time}
+    dimensions_.update(dimensions)
+    index, columns, timeColumns = _axes(concepts, dimensions_, index, columns, mrv, mrnev, timeColumns)
+
+    def frame(db):
+        return DataFrame(series, economy, time, index=index, columns=columns, mrv=mrv, mrnev=mrnev, skipBlanks=skipBlanks, labels=labels, skipAggs=skipAggs,
+            numericTimeKeys=numericTimeKeys, timeColumns=timeColumns, params=params, db=db, **dimensions)
+
+    return w.frames.get().concat(w.utils.pmap(frame, dbs), dbs, 'db')
+
+def LazyFrame(series, economy='all', time='all', partition=None, size=None, index=None, columns=None, mrv=None, mrnev=None, skipBlanks=False, labels=False, skipAggs=False, numericTimeKeys=False, timeColumns=False, params={}, db=None, **dimensions):
+    '''Return a lazy, partitioned version of a DataFrame request. This is useful for requests that are too large
+    to fit comfortably in memory, or to build partitions in parallel. No data is requested until partitions are computed.
+
+    Arguments:
+        partition:          the dimension to partition, e.g., 'series' or 'economy'. This must be an index dimension.
+                            If None, the function partitions series if possible, otherwise economies
+
+        size:               number of elements per partition. If None, partitions are the same chunks that would be
+                            used to keep API requests within the maximum URL length
+
+        All other arguments are the same as for DataFrame()
+
+    Returns:
+        a PartitionedFrame object. Iterate over it to compute and return partitions one at a time, call compute()
+        to return the complete DataFrame, or call to_dask() to return a dask DataFrame
+
+    Examples:
+        # process all WDI data a few indicators at a time
+        for df in wbgapi.data.LazyFrame('all', time=range(2010,2020), size=10):
+            print(df.describe())
+
+        # build all partitions in parallel
+        df = wbgapi.data.LazyFrame('all', mrnev=1, partition='series').compute()
+
+    Notes:
+        The index and columns are determined by the complete request, so all partitions have the same structure.
+        Note that mrv is calculated separately for each partition. For consistent results, don't partition
+        economies when requesting mrv
+    '''
+
+    w.frames.require()
+
+    if db is None:
+        db = w.db
+
+    dimensions_ = {'series': series, 'economy': economy, 'time': time}
+    dimensions_.update(dimensions)
+    concepts = w.source.concepts(db)
+    index, columns, timeColumns = _axes(concepts.keys(), dimensions_, index, columns, mrv, mrnev, timeColumns)
+
+    if partition is None:
+        partition = 'series' if 'series' in index else 'economy'
+
+    if partition not in index:
+        raise ValueError('{} must be an index dimension to partition the request'.format(partition))
+
+    ids = w.queryParam(dimensions_.get(partition, 'all'), partition, db=db)
+    if ids == 'all':
+        ids = ';'.join([row['id'] for row in w.source.features(partition, 'all', db=db)])
+
+    if size:
+        ids = ids.split(';')
+        parts = [ids[n:n+size] for n in range(0, len(ids), size)]
+    else:
+        # use the same chunks as refetch
+        parts = [x.split(';') for x in w._refetch_url('{x}', 'x', [], x=ids)]
+
+    kwargs = dict(index=index, columns=columns, mrv=mrv, mrnev=mrnev, skipBlanks=skipBlanks, labels=labels, skipAggs=skipAggs,
+        numericTimeKeys=numericTimeKeys, timeColumns=timeColumns, params=params, db=db)
+    kwargs.update(dimensions_)
+    return PartitionedFrame(partition, parts, index, kwargs)
+
+class PartitionedFrame():
+    '''Class returned by LazyFrame: a DataFrame request partitioned along one dimension. Partitions are
+    requested and built only when they are computed
+    '''
+
+    def __init__(self, dimension, partitions, index, kwargs):
+        self.dimension = dimension
+        self.partitions = partitions
+        self.index = index
+        self.kwargs = kwargs
+
+    def __len__(self):
+        return len(self.partitions)
+
+    def __iter__(self):
+        for n in range(len(self.partitions)):
+            yield self.partition(n)
+
+    def __repr__(self):
+        return 'PartitionedFrame: {} partitions of {}'.format(len(self.partitions), self.dimension)
+
+    def partition(self, n):
+        '''Compute partition n
+
+        Returns:
+            a DataFrame
+        '''
+
+        kwargs = self.kwargs.copy()
+        kwargs[self.dimension] = self.partitions[n]
+        return DataFrame(**kwargs)
+
+    def compute(self, max_workers=None):
+        '''Compute all partitions in parallel and return them as a single DataFrame
+
+        Arguments:
+            max_workers:    maximum number of partitions to compute at a time. Pass None to use wbgapi.max_workers
+        '''
+
+        frames = w.utils.pmap(self.partition, range(len(self.partitions)), max_workers=max_workers)
+        return w.frames.get().combine(frames, self.index)
+
+    def to_dask(self):
+        '''Return a dask DataFrame whose partitions are computed on demand. This requires dask and the pandas backend.
+        Since dask doesn't support multi-indexes, index dimensions are returned as columns
+        '''
+
+        import dask
+        import dask.dataframe
+
+        # dask would otherwise compute the first partition to learn the structure of the frame
+        meta = self._meta()
+        dtypes = meta.dtypes.to_dict()
+
+        def partition(n):
+            # partitions only have columns for the data they contain, so conform them to meta
+            return self.partition(n).reset_index().reindex(columns=meta.columns).astype(dtypes)
+
+        return dask.dataframe.from_delayed([dask.delayed(partition)(n) for n in range(len(self.partitions))], meta=meta)
+
+    def _meta(self):
+        '''Internal function that returns an empty pandas DataFrame with the structure of a partition after
+        reset_index(), as determined by the request. This requires no data requests
+        '''
+
+        kwargs = self.kwargs
+        (db, columns, numericTimeKeys) = (kwargs['db'], kwargs['columns'], kwargs['numericTimeKeys'])
+        concepts = w.source.concepts(db)
+
+        def keys(dimension):
+            # identifiers as the API reports them, converted as in _DataFrame
+            ids = [row['id'] for row in w.source.features(dimension, w.queryParam(kwargs.get(dimension, 'all'), dimension, db=db), db=db)]
+            if dimension == 'time' and numericTimeKeys:
+                ids = w.time.convert(ids, 'period' if numericTimeKeys == 'period' else 'int', db=db)
+
+            return builtins.list(ids)
+
+        ids = keys(columns)
+        values = {c: 'float64' for c in ids}
+        if kwargs['timeColumns']:
+            values.update({str(c) + w.frames.ts_suffix: 'object' for c in ids})
+
+        dtypes = {k: 'object' for k in self.index}
+        if 'time' in self.index and numericTimeKeys:
+            t = pd.Series(keys('time'))
+            dtypes['time'] = t.dtype if len(t) else 'object'
+
+        if kwargs['labels']:
+            dtypes.update({concepts[k]['value']: 'object' for k in self.index})
+
+        for k in sorted(values.keys(), key=str):
+            dtypes[k] = values[k]
+
+        return pd.DataFrame({k: pd.Series(dtype=v) for k,v in dtypes.items()})
+
+def get(series, economy, time='all', mrv=None, mrnev=None, labels=False, numericTimeKeys=False, db=None, **dimensions):
+    '''Retrieve a single data point for the current database
+
+    Arguments:
+        series:             a series identifier
+
+        economy:            an economy identifier
+
+        time:               a time identifier.  Both element keys and values are acceptable
+
+        mrv:                return only the specified number of most recent values (same time period for all economies)
+
+        mrnev:              return only the specified number of non-empty most recent values (time period varies)
+
+        labels:             include both dimension id and name (e.g., ZWE & Zimbabwe, not just ZWE)
+
+        numericTimeKeys:    store the time object by value (e.g., 2014) instead of key ('YR2014') if value is numeric
+
+        dimensions:         extra dimensions, database specific (e.g., version)
+
+    Returns:
+        a data observation
+
+    Notes:
+        This function simply calls fetch() and returns the first result. Hence, you should set mrv or mrnev to 1, or set
+        time to a single value to get predictable results.
+
+    Example:
+        # print the last population estimate for France
+        print(wbgapi.data.get('SP.POP.TOTL', 'FRA', mrnev=1)['value'])
+    '''
+
+    for row in fetch(series, economy, time, mrv=mrv, mrnev=mrnev, labels=labels, numericTimeKeys=numericTimeKeys, params={'per_page': 1}, db=db, **dimensions):
+        return row
+
+def get_many(cells, labels=False, numericTimeKeys=False, db=None):
+    '''Retrieve many individual data points with as few API requests as possible
+
+    Arguments:
+        cells:              a list-like of (series, economy, time) tuples. Tuples may include a 4th element,
+                            a dict of extra dimensions (e.g., {'version': 201904})
+
+        labels:             include both dimension id and name (e.g., ZWE & Zimbabwe, not just ZWE)
+
+        numericTimeKeys:    store the time object by value (e.g., 2014) instead of key ('YR2014') if value is numeric
+
+        db:                 database; pass None to access the global database
+
+    Returns:
+        a list of data observations in the same order as cells. Observations that don't exist are None
+
+    Example:
+        # population of Brazil in 2010 and GDP per capita of Argentina in 2015
+        for row in wbgapi.data.get_many([('SP.POP.TOTL', 'BRA', 2010), ('NY.GDP.PCAP.CD', 'ARG', 2015)]):
+            print(row['value'] if row else None)
+
+    Notes:
+        Cells are grouped into rectangular queries (sets of series x economies x time periods) that
+        cover exactly the requested cells, so that data points are retrieved in bulk. Each query is
+        chunked as necessary.
+    '''
+
+    if db is None:
+        db = w.db
+
+    def dims_key(dims):
+        return tuple(sorted([(k, w.queryParam(v, concept=k, db=db).upper()) for k,v in dims.items()]))
+
+    # normalize cell keys, then group as {dims: {time: {economy: {series}}}}
+    keys = []
+    groups = {}
+    for cell in cells:
+        (series, economy, time) = cell[0:3]
+        dims = dims_key(cell[3] if len(cell) > 3 else {})
+        key = (str(series).upper(), str(economy).upper(), w.queryParam(time, 'time', db=db).upper(), dims)
+        keys.append(key)
+        groups.setdefault(dims, {}).setdefault(key[2], {}).setdefault(key[1], set()).add(key[0])
+
+    def merge(rects, a, b, c):
+        # merge rectangles that share 2 dimensions (a and b) by combining the third (c)
+        merged = {}
+        for rect in rects:
+            merged.setdefault((rect[a], rect[b]), set()).update(rect[c])
+
+        result = []
+        for (x,y),z in merged.items():
+            rect = [None] * 3
+            (rect[a], rect[b], rect[c]) = (x, y, frozenset(z))
+            result.append(tuple(rect))
+
+        return result
+
+    queries = []
+    for dims,periods in groups.items():
+        # for each time period, economies with the same series can share a query. Rectangles are (series, economies, time)
+        rects = []
+        for time,economies in periods.items():
+            series = {}
+            for economy,s in economies.items():
+                series.setdefault(frozenset(s), set()).add(economy)
+
+            for s,e in series.items():
+                rects.append((s, frozenset(e), frozenset([time])))
+
+        # then combine rectangles that differ by only one dimension
+        rects = merge(rects, 0, 1, 2)
+        rects = merge(rects, 0, 2, 1)
+        rects = merge(rects, 1, 2, 0)
+        for (s,e,t) in rects:
+            queries.append((sorted(s), sorted(e), sorted(t), dict(dims)))
+
+    results = {}
+    for (series, economy, time, dims) in queries:
+        for row in fetch(series, economy, time, labels=True, db=db, **dims):
+            dims_ = tuple(sorted([(k, row[k]['id'].upper()) for k in dims.keys()]))
+            results[(row['series']['id'].upper(), row['economy']['id'].upper(), row['time']['id'].upper(), dims_)] = row
+
+    def format(row):
+        if row is None:
+            return None
+
+        if labels:
+            x = {k: v.copy() if type(v) is dict else v for k,v in row.items()}
+            if numericTimeKeys and x['time']['value'].isdigit():
+                x['time']['id'] = int(x['time']['value'])
+
+            return x
+
+        # same format as fetch(labels=False)
+        x = {}
+        for k,v in row.items():
+            if type(v) is not dict:
+                x[k] = v
+            elif k == 'time' and numericTimeKeys and v['value'].isdigit():
+                x[k] = int(v['value'])
+            else:
+                x[k] = v['id']
+                if k == 'economy':
+                    x['aggregate'] = v['aggregate']
+
+        return x
+
+    return [format(results.get(key)) for key in keys]
+
+def footnote(series, economy, time, db=None):
+    '''Return the footnote for a single data point, if any
+
+    Arguments:
+        series:             a series identifier
+
+        economy:            an economy identifier
+
+        time:               a time identifier.  Both element keys and values are acceptable
+
+    Returns:
+        footnote text, or None
+
+    Example:
+        print(wbgapi.data.footnote('SP.POP.TOTL', 'FRA', 2015))
+    '''
+
+    if db is None:
+        db = w.db
+
+    # note that this only supports singular footnote references at this point, although the interface suggests otherwise
+    url = 'sources/{source}/footnote/{economy}~{series}~{time}/metadata'
+    try:
+        for row in w.metadata(url, ['series'], source=db, series=series, economy=economy, time=w.queryParam(time, 'time', db=db)):
+            return row.metadata['FootNote']
+    except:
+        pass    # will return None then
+
+def bulk(archive, series='all', economy='all', time='all', skipBlanks=False, labels=False, skipAggs=False, numericTimeKeys=False):
+    '''Retrieve rows of data from a bulk download archive. Bulk archives are the zipped CSV files
+    that the API provides for complete indicators or databases (e.g., ?downloadformat=csv). This is
+    generally much faster than paging through fetch() for very large requests.
+
+    Arguments:
+        archive:            path or file-like object of a zip archive
+
+        series:             a series identifier or list-like, e.g., SP.POP.TOTL
+
+        economy:            an economy identifier or list-like, e.g., 'BRA' or ['USA', 'CAN', 'MEX']
+
+        time:               a time identifier or list-like, e.g., 'YR2015' or range(2010,2020).
+                            Both element keys and values are acceptable
+
+        skipBlanks:         skip empty observations
+
+        labels:             include both dimension id and name (e.g., ZWE & Zimbabwe, not just ZWE)
+
+        skipAggs:           skip aggregates
+
+        numericTimeKeys:    store the time object by value (e.g., 2014) instead of key ('YR2014') if value is numeric
+
+    Returns:
+        A generator object which returns rows in the same format as fetch()
+
+    Examples:
+        # print population data from a downloaded indicator file
+        for elem in wbgapi.data.bulk('API_SP.POP.TOTL_DS2_en_csv_v2.zip', economy=['BRA', 'ARG'], time=range(2010,2020)):
+            print(elem['economy'], elem['time'], elem['value'])
+
+    Notes:
+        The archive is decompressed and parsed incrementally, so it is never extracted to disk or loaded
+        in its entirety. Aggregates are identified from the country metadata file in the archive if there
+        is one; otherwise they are obtained from the API.
+    '''
+
+    def selection(x, time=False):
+        if type(x) is str and x == 'all':
+            return None
+
+        if type(x) is str or type(x) is int:
+            x = [x]
+
+        x = set(map(lambda v: str(v).upper(), x))
+        if time:
+            # accept both values and keys
+            x |= set(map(lambda v: 'YR' + v, filter(lambda v: v.isdigit(), x)))
+
+        return x
+
+    series_, economy_, time_ = selection(series), selection(economy), selection(time, time=True)
+
+    with zipfile.ZipFile(archive) as zf:
+        data_member = country_member = None
+        for member in zf.namelist():
+            if not member.lower().endswith('.csv'):
+                continue
+
+            with _bulk_reader(zf, member) as (header, reader):
+                if header is None:
+                    continue
+                elif data_member is None and 'Indicator Code' in header:
+                    data_member = member
+                elif country_member is None and 'Region' in header and 'Indicator Code' not in header:
+                    country_member = member
+
+        if data_member is None:
+            raise ValueError('{}: no data file found in the archive'.format(archive))
+
+        if country_member:
+            # aggregates have no region in the country metadata
+            aggs = set()
+            with _bulk_reader(zf, country_member) as (header, reader):
+                (c, r) = (header.index('Country Code'), header.index('Region'))
+                for row in reader:
+                    if len(row) > r and not row[r].strip():
+                        aggs.add(row[c])
+        else:
+            aggs = w.economy.aggregates()
+
+        with _bulk_reader(zf, data_member) as (header, reader):
+            (c_name, c_code, s_name, s_code) = map(header.index, ['Country Name', 'Country Code', 'Indicator Name', 'Indicator Code'])
+            periods = []
+            for n in range(s_code+1, len(header)):
+                if header[n]:
+                    v = header[n]
+                    periods.append((n, 'YR' + v if v.isdigit() else v, v))
+
+            if time_ is not None:
+                periods = builtins.list(filter(lambda x: x[1].upper() in time_ or x[2].upper() in time_, periods))
+
+            for row in reader:
+                if len(row) <= s_code:
+                    continue
+
+                if series_ is not None and row[s_code].upper() not in series_:
+                    continue
+
+                if economy_ is not None and row[c_code].upper() not in economy_:
+                    continue
+
+                aggregate = row[c_code] in aggs
+                if skipAggs and aggregate:
+                    continue
+
+                for n,key,value in periods:
+                    obs = row[n] if n < len(row) else ''
+                    if skipBlanks and obs == '':
+                        continue
+
+                    x = {'value': None if obs == '' else float(obs)}
+                    time_key = int(value) if numericTimeKeys and value.isdigit() else key
+                    if labels:
+                        x['economy'] = {'id': row[c_code], 'value': row[c_name], 'aggregate': aggregate}
+                        x['series'] = {'id': row[s_code], 'value': row[s_name]}
+                        x['time'] = {'id': time_key, 'value': value}
+                    else:
+                        x['economy'] = row[c_code]
+                        x['aggregate'] = aggregate
+                        x['series'] = row[s_code]
+                        x['time'] = time_key
+
+                    yield x
+
+def BulkFrame(archive, series='all', economy='all', time='all', index=None, columns=None, skipBlanks=False, labels=False, skipAggs=False, numericTimeKeys=False, flat=False):
+    '''Retrieve a pandas dataframe from a bulk download archive
+
+    Arguments:
+        archive:            path or file-like object of a zip archive
+
+        series:             a series identifier or list-like, e.g., SP.POP.TOTL
+
+        economy:            an economy identifier or list-like, e.g., 'BRA' or ['USA', 'CAN', 'MEX']
+
+        time:               a time identifier or list-like, e.g., 'YR2015' or range(2010,2020).
+                            Both element keys and values are acceptable
+
+        index:              name or list of dimensions for the DataFrame's index (see DataFrame)
+
+        columns:            name of the dimension for the DataFrame's columns (see DataFrame)
+
+        skipBlanks:         skip empty observations
+
+        labels:             include the dimension name for rows
+
+        skipAggs:           skip aggregates
+
+        numericTimeKeys:    store the time object by value (e.g., 2014) instead of key ('YR2014') if value is numeric.
+                            Pass 'period' to convert time keys to pandas periods (annual, quarterly or monthly)
+
+        flat:               return a flat dataframe (1 row per observation) as with FlatFrame. index, columns
+                            and numericTimeKeys are ignored
+
+    Returns:
+        a pandas DataFrame
+
+    Examples:
+        # GDP per capita for all economies and years
+        wbgapi.data.BulkFrame('API_NY.GDP.PCAP.CD_DS2_en_csv_v2.zip')
+    '''
+
+    w.frames.require()
+
+    if flat:
+        return _FlatFrame(bulk(archive, series, economy, time, skipBlanks=skipBlanks, labels=True, skipAggs=skipAggs, numericTimeKeys=True), labels)
+
+    dimensions_ = {'series': series, 'economy': economy, 'time': time}
+    index, columns, _ = _axes(_bulk_concepts.keys(), dimensions_, index, columns, None, None, False)
+
+    return _DataFrame(bulk(archive, series, economy, time, skipBlanks=skipBlanks, labels=True, skipAggs=skipAggs),
+        index, columns, labels, False, _bulk_concepts, numericTimeKeys=numericTimeKeys)
+
+# concept names for bulk archives, in the same format as source.concepts()
+_bulk_concepts = {
+    'economy': {'key': 'country', 'value': 'Country'},
+    'series':  {'key': 'series', 'value': 'Series'},
+    'time':    {'key': 'time', 'value': 'Time'},
+}
+
+def footnotes(series, economy, time, db=None):
+    '''Return footnotes for many data points
+
+    Arguments:
+        series:             a series identifier or list-like, e.g., SP.POP.TOTL
+
+        economy:            an economy identifier or list-like, e.g., 'BRA' or ['USA', 'CAN', 'MEX']
+
+        time:               a time identifier or list-like, e.g., 'YR2015' or range(2010,2020).
+                            Both element keys and values are acceptable
+
+        db:                 database; pass None to access the global database
+
+    Returns:
+        a dict of footnote text keyed by (series, economy, time) tuples. Data points without footnotes are omitted
+
+    Example:
+        notes = wbgapi.data.footnotes('SP.POP.TOTL', ['FRA', 'DEU'], range(2010,2020))
+        print(notes.get(('SP.POP.TOTL', 'FRA', 'YR2015')))
+
+    Notes:
+        Footnotes are requested for every combination of series, economy and time, many per request. Passing
+        'all' for any dimension is allowed but could be very time consuming for large databases.
+    '''
+
+    if db is None:
+        db = w.db
+
+    keys = []
+    for s in utils.ids(series, 'series', db):
+        for e in utils.ids(economy, 'economy', db):
+            for t in utils.ids(time, 'time', db):
+                keys.append('{}~{}~{}'.format(e, s, t))
+
+    result = {}
+    if not keys:
+        return result
+
+    url = 'sources/{source}/footnote/{keys}/metadata'
+    for row in w._metadata_chunks(url, 'keys', fields='FootNote', source=db, keys=';'.join(keys)):
+        if 'FootNote' in row.metadata:
+            (e, s, t) = row.id.split('~')
+            result[(s, e, t)] = row.metadata['FootNote']
+
+    return result
+
+def FootnoteFrame(series, economy, time, index=None, columns=None, numericTimeKeys=False, db=None):
+    '''Return footnotes for many data points as a pandas DataFrame. The frame has the same index and columns
+    as a DataFrame() request with the same parameters, so the two can be aligned
+
+    Arguments:
+        series:             a series identifier or list-like, e.g., SP.POP.TOTL
+
+        economy:            an economy identifier or list-like, e.g., 'BRA' or ['USA', 'CAN', 'MEX']
+
+        time:               a time identifier or list-like, e.g., 'YR2015' or range(2010,2020).
+                            Both element keys and values are acceptable
+
+        index:              name or list of dimensions for the DataFrame's index (see DataFrame)
+
+        columns:            name of the dimension for the DataFrame's columns (see DataFrame)
+
+        numericTimeKeys:    store the time object by value (e.g., 2014) instead of key ('YR2014') if value is numeric.
+                            Pass 'period' to convert time keys to pandas periods (annual, quarterly or monthly)
+
+        db:                 database; pass None to access the global database
+
+    Returns:
+        a pandas DataFrame of footnote text
+
+    Example:
+        # population data for Europe and corresponding footnotes
+        df = wbgapi.data.DataFrame('SP.POP.TOTL', wb.region.members('ECS'), range(2010,2020))
+        notes = wbgapi.data.FootnoteFrame('SP.POP.TOTL', wb.region.members('ECS'), range(2010,2020)).reindex_like(df)
+    '''
+
+    w.frames.require()
+
+    if db is None:
+        db = w.db
+
+    dimensions_ = {'series': series, 'economy': economy, 'time': time}
+    index, columns, _ = _axes(['economy', 'series', 'time'], dimensions_, index, columns, None, None, False)
+
+    rows = [{'value': v, 'series': {'id': s}, 'economy': {'id': e}, 'time': {'id': t}} for (s,e,t),v in footnotes(series, economy, time, db=db).items()]
+    return _DataFrame(rows, index, columns, False, False, _bulk_concepts, numericTimeKeys=numericTimeKeys, db=db)
+
+def _dblist(db):
+    '''Internal function that returns a list of databases from a database argument and warms
+    the concept caches that concurrent requests would otherwise all try to fill
+    '''
+
+    if db is None:
+        db = w.db
+
+    dbs = [db] if type(db) in [str, int] else builtins.list(db)
+    w.utils.pmap(w.source.concepts, dbs)
+    return dbs
+
+def cache_clear():
+    '''Empty the result cache (see cache_size)
+    '''
+
+    global _result_cache_count
+
+    with _result_cache_lock:
+        _result_cache.clear()
+        _result_cache_count = 0
+
+def _cache_params(params):
+    '''Internal function that returns the part of the result cache key derived from query parameters
+    '''
+
+    return tuple(sorted([(k, str(v)) for k,v in params.items() if k not in ['per_page', 'mrv', 'mrnev']]))
+
+def _cache_selection(keys, values):
+    '''Internal function that normalizes the dimension values of a query (as returned by queryParam)
+    so that equivalent queries are recognized. Returns a tuple of (dimension, frozenset) pairs, where
+    None means all elements
+    '''
+
+    def normalize(v):
+        if v == 'all':
+            return None
+
+        return frozenset(map(lambda x: x.strip().upper(), v.split(';')))
+
+    return tuple([(k, normalize(values[k])) for k in sorted(keys)])
+
+def _cache_lookup(key, selection, concept_keys):
+    '''Internal function that searches the result cache for the requested selection or a superset of it
+
+    Returns:
+        a list of rows, or None if the selection isn't cached
+    '''
+
+    match = None
+    with _result_cache_lock:
+        for (key2, selection2) in reversed(_result_cache):
+            if key2 != key or len(selection2) != len(selection):
+                continue
+
+            (rows, present) = _result_cache[(key2, selection2)]
+            filters = {}
+            for (dim,ids),(dim2,ids2) in zip(selection, selection2):
+                if dim != dim2 or (ids2 is not None and (ids is None or not ids <= ids2)):
+                    break
+
+                if ids != ids2:
+                    if not ids <= present[dim]:
+                        # requested identifiers aren't in the results: these could be aliases (e.g., iso2 codes)
+                        # or invalid, so we let the API decide
+                        break
+
+                    filters[dim] = ids
+            else:
+                _result_cache.move_to_end((key2, selection2))
+                match = (rows, filters)
+                break
+
+    if match is None:
+        return None
+
+    (rows, filters) = match
+    if not filters:
+        return rows
+
+    return builtins.list(filter(lambda row: all([elem['id'].upper() in filters.get(concept_keys[elem['concept'].lower()], (elem['id'].upper(),)) for elem in row['variable']]), rows))
+
+def _cache_rows(key, selection, rows, concept_keys):
+    '''Internal generator that passes rows through from the API and stores them in the result
+    cache once they have all been read. Results larger than the cache are not buffered
+    '''
+
+    stored = []
+    present = {k: set() for k,_ in selection}
+    for row in rows:
+        if stored is not None:
+            if len(stored) < cache_size:
+                stored.append(row)
+                for elem in row['variable']:
+                    present[concept_keys[elem['concept'].lower()]].add(elem['id'].upper())
+            else:
+                # too large to cache: stop buffering but keep streaming
+                (stored, present) = (None, None)
+
+        yield row
+
+    if stored is None:
+        return
+
+    global _result_cache_count
+
+    with _result_cache_lock:
+        if (key, selection) in _result_cache:
+            _result_cache_count -= len(_result_cache.pop((key, selection))[0])
+
+        # evict the least recently used results until there's room
+        while _result_cache and _result_cache_count + len(stored) > cache_size:
+            _result_cache_count -= len(_result_cache.popitem(last=False)[1][0])
+
+        _result_cache[(key, selection)] = (stored, present)
+        _result_cache_count += len(stored)
+
+def _most_recent(rows, concept_keys, mrv=None, mrnev=None):
+    '''Internal function that computes mrv or mrnev results from a full history of rows
+    as returned by the API
+
+    Returns:
+        a list of rows, or None if the calculation isn't possible
+    '''
+
+    if not pd:
+        return None
+
+    if len(rows) == 0:
+        return rows
+
+    columns = {'value': [row['value'] for row in rows]}
+    for n,elem in enumerate(rows[0]['variable']):
+        columns[concept_keys[elem['concept'].lower()]] = [row['variable'][n]['id'] for row in rows]
+
+    df = pd.DataFrame(columns)
+    groups = builtins.list(filter(lambda x: x not in ['value', 'time'], df.columns))
+    df = df.sort_values('time', kind='stable')
+    nonblank = df[df['value'].notna()]
+
+    if mrnev:
+        # the last N non-empty observations for each series/economy/etc
+        df = nonblank.groupby(groups, sort=False).tail(mrnev)
+    else:
+        # the last N time periods with data for each series; these are the same for all economies
+        periods = nonblank[['series', 'time']].drop_duplicates().groupby('series', sort=False).tail(mrv)
+        df = df[pd.MultiIndex.from_frame(df[['series', 'time']]).isin(pd.MultiIndex.from_frame(periods))]
+
+    return [rows[n] for n in df.index.sort_values()]
+
+class _bulk_reader():
+    '''Internal context manager that opens a CSV file in a bulk archive as a stream and
+    skips the preamble. Yields a tuple of (header,reader) where header is None if
+    the file doesn't look like a data or metadata file
+    '''
+
+    def __init__(self, zf, member):
+        self.fp = io.TextIOWrapper(zf.open(member), encoding='utf-8-sig', newline='')
+
+    def __enter__(self):
+        reader = csv.reader(self.fp)
+
+        # the API puts a few lines of information (source, date, etc) before the column names
+        for n,row in enumerate(reader):
+            if 'Country Code' in row:
+                return (row, reader)
+
+            if n >= 10:
+                break
+
+        return (None, reader)
+
+    def __exit__(self, *args):
+        self.fp.close()
+
+def _FlatFrame(rows, labels, numericTimeKeys=False, db=None):
+    '''Internal function that builds a flat dataframe from rows (as returned by fetch with labels=True)
+    '''
+
+    key = 'value' if labels else 'id'
+    data = None
+
+    for row in rows:
+        if data is None:
+            # this assumes that the API returns the same object structure in every row, so we can use the first as a template
+            columns = builtins.list(row.keys())
+            data = {k: [] for k in columns}
+
+        for k in columns:
+            data[k].append(row[k][key] if type(row[k]) is dict else row[k])
+
+    if data is None:
+        return None
+
+    if numericTimeKeys and not labels and 'time' in data:
+        data['time'] = w.time.convert(data['time'], db=db)
+
+    return w.frames.get().flat(data, columns)
+
+def _axes(dimensions, values, index, columns, mrv, mrnev, timeColumns):
+    '''Internal function that infers the index and columns of a dataframe from its request parameters
+
+    Arguments:
+        dimensions:     the dimensions (concepts) of the database
+
+        values:         a dict of requested values for each dimension, keyed by dimension name
+
+        index/columns/mrv/mrnev/timeColumns: as passed to DataFrame
+
+    Returns:
+        a tuple of (index, columns, timeColumns)
+    '''
 
     def is_single(x):
 
@@ -248,12 +1162,9 @@ def DataFrame(series, economy='all', time='all', index=None, columns=None, mrv=N
         # not necessary to pass db since we don't actually care about the parameters just the count of them
         return len(w.queryParam(x).split(';')) == 1
 
-    if pd is None:
-        raise ModuleNotFoundError('you must install pandas to use this feature')
-
     # set up the axes by looking at the index/column parameters
     concepts = ['economy','series','time']
-    for k,v in w.source.concepts(db).items():
+    for k in dimensions:
         if k not in concepts:
             concepts.insert(0, k)
 
@@ -263,9 +1174,6 @@ def DataFrame(series, economy='all', time='all', index=None, columns=None, mrv=N
     if index is None or columns is None:
         # we need to infer at least one dimension
 
-        dimensions_ = {'series': series, 'economy': economy, 'time': time}
-        dimensions_.update(dimensions)
-
         axes = concepts.copy()
 
         # now we reduce axes by eliminating any dimension consisting of 
@@ -280,13 +1188,13 @@ def DataFrame(series, economy='all', time='all', index=None, columns=None, mrv=N
             if k == columns or (type(index) is list and k in index):
                 continue
 
-            values = dimensions_.get(k, 'all')
-            if k == 'time' and (mrv == 1 or mrnev == 1 or is_single(values)):
+            v = values.get(k, 'all')
+            if k == 'time' and (mrv == 1 or mrnev == 1 or is_single(v)):
                 axes.remove(k)
                 if timeColumns == 'auto' and (mrv == 1 or mrnev == 1):
                     timeColumns = True
 
-            elif is_single(values):
+            elif is_single(v):
                 axes.remove(k)
 
         if columns is None and index is None:
@@ -294,12 +1202,12 @@ def DataFrame(series, economy='all', time='all', index=None, columns=None, mrv=N
             index = axes
         elif columns is None:
             # try to guess a column based on what index doesn't define
-            x = list(filter(lambda x: x not in index, axes))
+            x = builtins.list(filter(lambda x: x not in index, axes))
             if len(x) > 0:
                 columns = x[-1]
-            elif (set(concepts) - set(list)) > 0:
+            elif len(set(concepts) - set(index)) > 0:
                 # index has claimed all non-singular dimensions, so set columns from the full concepts list
-                x = list(filter(lambda x: x not in index, concepts))
+                x = builtins.list(filter(lambda x: x not in index, concepts))
                 columns = x[-1]
             else:
                 # index is the same as the concepts list. That's not allowed
@@ -322,101 +1230,62 @@ def DataFrame(series, economy='all', time='all', index=None, columns=None, mrv=N
     if columns == 'time' or 'time' in index or timeColumns == 'auto':
         timeColumns = False
 
-    # for now let's see if it works to build the dataframe dynamically
-    df = frame(index)
-    dummy = pd.Series(dtype='float64')    # empty series - never assigned actual values
-    ts_suffix = ':T'
-    concepts = w.source.concepts(db)
-    if labels:
-        # create a separate dataframe for labels so that we can control the column position below
-        df2 = frame(index)
-
-    for row in fetch(series, economy, time, mrv=mrv, mrnev=mrnev, skipBlanks=skipBlanks, labels=True, skipAggs=skipAggs, numericTimeKeys=numericTimeKeys, params=params, db=db, **dimensions):
-        column_key = row[columns]['id']
-        if len(index) == 1:
-            index_key = row[index[0]]['id']
-        else:
-            index_key = tuple(map(lambda x: row[x]['id'], index))
-
-        # this logic only assigns values to locations that don't yet exist. First observations thus take precedent over subsequent ones
-        if pd.isna(df.get(column_key, dummy).get(index_key)):
-            df.loc[index_key, column_key] = np.nan if row['value'] is None else row['value']
-            if timeColumns:
-                df.loc[index_key, column_key + ts_suffix] = row['time']['value']
-
-            if labels:
-                for i in index:
-                    df2.loc[index_key, concepts[i]['value']] = row[i]['value']
-        
-    df.sort_index(axis=0,inplace=True)
-    df.sort_index(axis=1,inplace=True)
-    if labels:
-        return df2.join(df)
-        # return pd.concat([df2,df], axis=1, sort=False)
-        
-    return df
-        
+    return (index, columns, timeColumns)
 
-def get(series, economy, time='all', mrv=None, mrnev=None, labels=False, numericTimeKeys=False, db=None, **dimensions):
-    '''Retrieve a single data point for the current database
+def _DataFrame(rows, index, columns, labels, timeColumns, concepts, numericTimeKeys=False, db=None):
+    '''Internal function that builds a 2-dimensional dataframe from rows (as returned by fetch with labels=True)
 
     Arguments:
-        series:             a series identifier
+        rows:           an iterable of rows
 
-        economy:            an economy identifier
+        index:          list of index dimensions
 
-        time:               a time identifier.  Both element keys and values are acceptable
+        columns:        column dimension
 
-        mrv:                return only the specified number of most recent values (same time period for all economies)
+        labels:         include the dimension name for rows
 
-        mrnev:              return only the specified number of non-empty most recent values (time period varies)
+        timeColumns:    add extra columns to show the time dimension for each column
 
-        labels:             include both dimension id and name (e.g., ZWE & Zimbabwe, not just ZWE)
+        concepts:       concepts dict (as returned by source.concepts)
 
-        numericTimeKeys:    store the time object by value (e.g., 2014) instead of key ('YR2014') if value is numeric
+        numericTimeKeys: True or 'period' to convert time keys (see time.convert)
 
-        dimensions:         extra dimensions, database specific (e.g., version)
+        db:             database, for converting time keys
 
     Returns:
-        a data observation
-
-    Notes:
-        This function simply calls fetch() and returns the first result. Hence, you should set mrv or mrnev to 1, or set
-        time to a single value to get predictable results.
-
-    Example:
-        # print the last population estimate for France
-        print(wbgapi.data.get('SP.POP.TOTL', 'FRA', mrnev=1)['value'])
+        a DataFrame from the current frame backend
     '''
 
-    for row in fetch(series, economy, time, mrv=mrv, mrnev=mrnev, labels=labels, numericTimeKeys=numericTimeKeys, params={'per_page': 1}, db=db, **dimensions):
-        return row
+    backend = w.frames.get()
+    if numericTimeKeys == 'period' and backend.name != 'pandas':
+        raise ValueError('period time keys require the pandas backend')
 
-def footnote(series, economy, time, db=None):
-    '''Return the footnote for a single data point, if any
+    # build columnar buffers, then let the backend pivot them in one step
+    data = {k: [] for k in index + [columns, 'value']}
+    if timeColumns:
+        data['_time'] = []
 
-    Arguments:
-        series:             a series identifier
+    label_columns = None
+    if labels:
+        label_columns = {'_label_' + i: concepts[i]['value'] for i in index}
+        for k in label_columns.keys():
+            data[k] = []
 
-        economy:            an economy identifier
+    for row in rows:
+        for k in index:
+            data[k].append(row[k]['id'])
 
-        time:               a time identifier.  Both element keys and values are acceptable
+        data[columns].append(row[columns]['id'])
+        data['value'].append(row['value'])
+        if timeColumns:
+            data['_time'].append(row['time']['value'])
 
-    Returns:
-        footnote text, or None
+        if labels:
+            for i in index:
+                data['_label_' + i].append(row[i]['value'])
 
-    Example:
-        print(wbgapi.data.footnote('SP.POP.TOTL', 'FRA', 2015))
-    '''
-
-    if db is None:
-        db = w.db
-
-    # note that this only supports singular footnote references at this point, although the interface suggests otherwise
-    url = 'sources/{source}/footnote/{economy}~{series}~{time}/metadata'
-    try:
-        for row in w.metadata(url, ['series'], source=db, series=series, economy=economy, time=w.queryParam(time, 'time', db=db)):
-            return row.metadata['FootNote']
-    except:
-        pass    # will return None then
+    if numericTimeKeys and 'time' in data:
+        # convert the entire column at once
+        data['time'] = w.time.convert(data['time'], 'period' if numericTimeKeys == 'period' else 'int', db=db)
 
+    return backend.wide(data, index, columns, timeColumns=timeColumns, labels=label_columns)
@@ -19,14 +19,24 @@ from . import utils
 from .economy_coder import coder, coder_report
 from functools import reduce
 import builtins
-try:
-    import numpy as np
-    import pandas as pd
-except ImportError:
-    np = None
-    pd = None
+import json
+import os
+import threading
+
+# how aggregate economies are identified: 'api' (from the API's country list, falling back to the
+# bundled snapshot if the API can't be reached), 'snapshot' (from the list bundled with wbgapi, which
+# requires no requests) or a function that returns a set of economy codes
+aggregate_source = 'api'
+
+# classification columns in economy records
+_class_columns = ['region', 'adminregion', 'lendingType', 'incomeLevel']
 
 _aggs = None
+_aggs_failed = False    # True if aggregates couldn't be retrieved from the API, so the snapshot is used
+_aggs_prefetch = None   # background thread that retrieves aggregates: see _prefetch_aggregates
+_aggs_prefetch_lock = threading.Lock()
+_aggs_snapshot = None
+_aggs_snapshot_version = 1
 _empty_meta_value = '' # value used to for mull string economy metadata
 
 # a dict of ISO2 code equivalents, if we ever need this
@@ -38,6 +48,23 @@ _class_data = None
 # translated names of regions and cities. This is keyed by language and code
 _localized_metadata = {}
 
+# index of group memberships built from _class_data: (class data, economy codes, {(param, group): bitmask})
+_member_index = None
+
+# members of groups that aren't in the index (e.g., EUU), keyed by (param, group)
+_member_fallback = {}
+
+# income groups that are combinations of others
+_member_composites = {
+    ('incomelevel', 'MIC'): ['LMC', 'UMC'],
+    ('incomelevel', 'LMY'): ['LIC', 'LMC', 'UMC'],
+}
+
+# locks that prevent concurrent updates of the caches for the same language
+_cache_locks = {}
+_cache_locks_lock = threading.Lock()
+_class_data_lock = threading.Lock()
+
 def list(id='all', q=None, labels=False, skipAggs=False, db=None):
     '''Return a list of economies in the current database
 
@@ -101,7 +128,7 @@ def _build(row,labels=False):
         row.update(cd)
         row['capitalCity'] = _localized_metadata[w.lang].get('capitalCity:'+row['id'])
         if labels:
-            for key in ['region', 'adminregion', 'lendingType', 'incomeLevel']:
+            for key in _class_columns:
                 row[key] = {'id': row[key], 'value': _localized_metadata[w.lang].get(row[key])}
 
 
@@ -118,33 +145,43 @@ def DataFrame(id='all',labels=False, skipAggs=False, db=None):
     Returns:
         a pandas DataFrame
 
+    Notes:
+        Classification columns (region, adminregion, lendingType and incomeLevel) are categorical,
+        which makes them compact and fast to join onto large data frames
+
     Example:
         # fetch a DataFrame of high-income countries
         df = wbgapi.economy.DataFrame(wbgapi.income.members('HIC'))
     '''
 
-    if pd is None:
-        raise ModuleNotFoundError('you must install pandas to use this feature')
+    backend = w.frames.get()
+    update_caches()
+    localized = _localized_metadata[w.lang]
+
+    # columns are built directly from the cached classification tables rather than row by row
+    economies = builtins.list(w.source.features('economy', w.queryParam(id, 'economy', db=db), db=db))
+    classes = [_class_data.get(row['id']) or _class_data.get('___') for row in economies]
+    if skipAggs:
+        keep = [i for i,c in enumerate(classes) if c and c['aggregate'] == False]
+        economies = [economies[i] for i in keep]
+        classes = [classes[i] for i in keep]
 
-    df = None
-    row_key = 'value' if labels else 'id'
+    if not economies:
+        return None
 
-    for row in list(id,labels=True, skipAggs=skipAggs, db=db):
-        if df is None:
-            columns = builtins.list(row.keys())
-            columns.remove('id')
-            columns.remove('value')
-            df = pd.DataFrame(columns=['name']+columns)
-            df.index.name = 'id'
+    ids = [row['id'] for row in economies]
+    data = {'id': ids, 'name': [row['value'] for row in economies]}
+    columns = ['name']
+    if classes[0]:
+        for k in classes[0].keys():
+            data[k] = [c[k] for c in classes]
+            if labels and k in _class_columns:
+                data[k] = [localized.get(x) for x in data[k]]
 
-        key = row['id']
-        name = row['value']
-        del(row['id'])
-        del(row['value'])
-        values = map(lambda x: x[row_key] if type(x) is dict else (np.nan if x is None else x), builtins.list(row.values()))
-        df.loc[key] = [name] + builtins.list(values)
+        data['capitalCity'] = [localized.get('capitalCity:'+x) for x in ids]
+        columns = builtins.list(data.keys())[1:]
 
-    return df
+    return backend.table(data, 'id', columns, categories=[k for k in _class_columns if k in data])
 
 def Series(id='all', q=None, skipAggs=False, db=None, name='EconomyName'):
     '''Return a pandas series by calling list
@@ -153,71 +190,313 @@ def Series(id='all', q=None, skipAggs=False, db=None, name='EconomyName'):
     return w.Series(list(id, q=q, skipAggs=skipAggs, db=db), name=name)
 
 
+def members(region=None, incomeLevel=None, lendingType=None):
+    '''Return economies that belong to all of the specified groups. This is calculated locally from
+    cached classifications, so it requires no API requests once the caches are filled
+
+    Arguments:
+        region:         a region identifier or list-like (economies in any of them)
+
+        incomeLevel:    an income group identifier or list-like
+
+        lendingType:    a lending group identifier or list-like
+
+    Returns:
+        a set object of economy identifiers. Aggregates are never included
+
+    Example:
+        # upper middle-income economies in Latin America
+        wbgapi.economy.members(region='LCN', incomeLevel='UMC')
+    '''
+
+    (_, codes, _) = _members_index()
+    mask = (1 << len(codes)) - 1
+    for param,id in [('region', region), ('incomelevel', incomeLevel), ('lendingtype', lendingType)]:
+        if id is not None:
+            mask &= _group_mask(param, id)
+
+    return _mask_members(codes, mask)
+
+def _group_members(param, id):
+    '''Internal function that returns the members of a region, income or lending group (or list-like of them)
+
+    Arguments:
+        param:      'region', 'incomelevel' or 'lendingtype'
+
+        id:         a group identifier or list-like
+    '''
+
+    (_, codes, _) = _members_index()
+    return _mask_members(codes, _group_mask(param, id))
+
+def _group_mask(param, id):
+    '''Internal function that returns the bitmask of members of a group or list-like of groups
+    '''
+
+    (_, codes, masks) = _members_index()
+    mask = 0
+    for group in w.queryParam(id).split(';'):
+        group = group.upper()
+        m = masks.get((param, group))
+        if m is None:
+            # not a classification used in the country list (e.g., EUU), so ask the API once
+            e = _member_fallback.get((param, group))
+            if e is None:
+                e = _member_fallback[(param, group)] = {row['id'] for row in w.fetch('country', {param: group})}
+
+            m = 0
+            for i,code in enumerate(codes):
+                if code in e:
+                    m |= 1 << i
+
+        mask |= m
+
+    return mask
+
+def _mask_members(codes, mask):
+    '''Internal function that converts a bitmask to a set of economy identifiers
+    '''
+
+    return {code for i,code in enumerate(codes) if mask >> i & 1}
+
+def _members_index():
+    '''Internal function that returns the group membership index, rebuilding it if the classifications have changed
+    '''
+
+    global _member_index
+
+    update_caches()
+    class_data = _class_data
+    index = _member_index
+    if index is not None and index[0] is class_data:
+        return index
+
+    codes = [k for k,v in class_data.items() if k != '___' and not v['aggregate']]
+    masks = {}
+    for i,code in enumerate(codes):
+        c = class_data[code]
+        for param,key in [('region', 'region'), ('region', 'adminregion'), ('incomelevel', 'incomeLevel'), ('lendingtype', 'lendingType')]:
+            if c[key]:
+                masks[(param, c[key])] = masks.get((param, c[key]), 0) | (1 << i)
+
+    for k,parts in _member_composites.items():
+        masks[k] = reduce(lambda a,b: a | masks.get((k[0], b), 0), parts, 0)
+
+    index = _member_index = (class_data, codes, masks)
+    return index
+
 def aggregates():
     '''Returns a set object with both the 2-character and 3-character codes
-    of aggregate economies. These are obtained from the API and then cached.
+    of aggregate economies. By default these are obtained from the API and then cached.
+
+    Notes:
+        Set wbgapi.economy.aggregate_source to change where aggregates come from. For instance,
+        'snapshot' uses the list bundled with wbgapi, which requires no API requests, or you can
+        assign a function that returns a set of codes
     '''
 
-    global _aggs
+    if callable(aggregate_source):
+        return aggregate_source()
+
+    if aggregate_source == 'snapshot':
+        return aggregates_snapshot()
+
+    global _aggs_failed
+
+    if _aggs is None:
+        # wait for a request that's already under way rather than starting another
+        prefetch = _aggs_prefetch
+        if prefetch is not None:
+            prefetch.join()
+
+    if _aggs is None:
+        if _aggs_failed:
+            return aggregates_snapshot()
+
+        try:
+            update_caches()
+        except (w.APIError, w.requests.exceptions.RequestException):
+            # offline, or the API is unavailable. Don't try again
+            _aggs_failed = True
+            return aggregates_snapshot()
 
-    update_caches()
     return _aggs
 
-def update_caches():
+def aggregates_snapshot():
+    '''Returns a set object with the codes of aggregate economies from the snapshot bundled with wbgapi.
+    This is used when the API can't be reached, and may not reflect recent changes to the API.
+    '''
+
+    global _aggs_snapshot
+
+    if _aggs_snapshot is None:
+        with open(os.path.join(os.path.dirname(__file__), 'aggregates.json'), 'r') as fp:
+            data = json.load(fp)
+
+        if data.get('version') != _aggs_snapshot_version:
+            raise ValueError('aggregates.json: unsupported snapshot version')
+
+        aggs = set()
+        for iso3,iso2 in data['aggregates'].items():
+            aggs.update([iso3, iso2])
+
+        _aggs_snapshot = aggs
+
+    return _aggs_snapshot
+
+def _country_coded(concepts):
+    '''Internal function that returns True if a database's economy dimension uses country codes (as opposed to
+    sub-national regions), given the database's concepts
+    '''
+
+    c = concepts.get('economy')
+    return c is not None and c['key'] in ['country', 'receiving%20countries%20', 'receiving%20countries']
+
+def _prefetch_aggregates():
+    '''Internal function that resolves aggregates in a background thread, so that the API requests
+    overlap with whatever the caller does next. Only one thread runs at a time, and subsequent calls
+    to aggregates() wait for it to finish
+    '''
+
+    global _aggs_prefetch
+
+    if _aggs is not None or _aggs_failed or callable(aggregate_source) or aggregate_source != 'api':
+        return
+
+    def run():
+        global _aggs_failed
+
+        try:
+            update_caches()
+        except (w.APIError, w.requests.exceptions.RequestException):
+            # offline, or the API is unavailable: aggregates() falls back to the snapshot
+            _aggs_failed = True
+        except Exception:
+            # aggregates() will try again and report the error
+            pass
+
+    with _aggs_prefetch_lock:
+        if _aggs_prefetch is not None and _aggs_prefetch.is_alive():
+            return
+
+        _aggs_prefetch = threading.Thread(target=run, name='wbgapi-aggregates', daemon=True)
+        _aggs_prefetch.start()
+
+def update_caches(lang=None):
     '''Update internal metadata caches. This needs to be called prior to
     any fetch from an economy endpoint
+
+    Arguments:
+        lang:       language; pass None to use wbgapi.lang
+
+    Notes:
+        Caches for different languages can be updated concurrently, e.g., with
+        wbgapi.utils.pmap(wbgapi.economy.update_caches, ['en', 'fr', 'es'])
     '''
-    global _localized_metadata, _iso2Codes, _class_data, _aggs
 
-    if _localized_metadata.get(w.lang):
+    if lang is None:
+        lang = w.lang
+
+    if _localized_metadata.get(lang):
         # nothing to do
         return
 
-    # update translation data here except city names
-    db = {}
-    for elem in ['region', 'incomelevel', 'lendingtype']:
-        for row in w.fetch(elem):
+    with _cache_lock(lang):
+        # another thread may have updated the cache while we waited
+        if not _localized_metadata.get(lang):
+            _update_caches(lang)
+
+def _update_caches(lang):
+    '''Internal function that fills the caches for a language (see update_caches)
+    '''
+
+    global _class_data, _aggs
+
+    # classifications are the same in every language, so we only need them once. If several languages are
+    # updated at once, one thread retrieves them and the others wait
+    with _class_data_lock:
+        if _class_data is None:
+            (localized, iso2Codes, class_data, aggs) = _fetch_caches(lang, classifications=True)
+            _iso2Codes.update(iso2Codes)
+            (_class_data, _aggs) = (class_data, aggs)
+            _localized_metadata[lang] = localized
+            return
+
+    (localized, iso2Codes, _, _) = _fetch_caches(lang, classifications=False)
+    _iso2Codes.update(iso2Codes)
+    _localized_metadata[lang] = localized
+
+def _cache_lock(lang):
+    '''Internal function that returns the lock for updating the caches for a language
+    '''
+
+    with _cache_locks_lock:
+        return _cache_locks.setdefault(lang, threading.Lock())
+
+def _fetch_caches(lang, classifications=True):
+    '''Internal function that retrieves the data for update_caches from the API
+
+    Arguments:
+        lang:               language
+
+        classifications:    also build classification data, which is the same in every language. Localized
+                            names of all regions, income levels and lending types are always retrieved,
+                            including aggregate-only groups that no economy is classified in
+
+    Returns:
+        a tuple of (localized metadata, iso2 codes, classification data, aggregates) for the language. The
+        last two are None if classifications is False
+    '''
+
+    urls = ['region', 'incomelevel', 'lendingtype', 'country/all']
+
+    # requests are independent, so we send them concurrently
+    results = w.utils.pmap(lambda url: builtins.list(w.fetch(url, lang=lang)), urls)
+    countries = results.pop()
+
+    # translation data here except city names
+    localized = {}
+    iso2Codes = {}
+    for rows in results:
+        for row in rows:
             if 'name' in row:
-                db[row['code']] = row['name'].strip()
+                localized[row['code']] = row['name'].strip()
             else:
-                db[row['id']] = row['value'].strip()
+                localized[row['id']] = row['value'].strip()
+
+            iso2Codes[row['id']] = row['iso2code']
 
-            _iso2Codes[row['id']] = row['iso2code']
+    if not classifications:
+        for row in countries:
+            localized['capitalCity:'+row['id']] = (row['capitalCity'].strip() or _empty_meta_value)
 
-    _localized_metadata[w.lang] = db
+        return (localized, iso2Codes, None, None)
 
-    url = 'country/all'
-    if type(_class_data) is not dict:
-        # initialize objects
-        _class_data = {}
-        _aggs = set()
+    class_data = {}
+    aggs = set()
 
-        # here, we update codes and city translations simultaneously
-        for row in w.fetch(url):
-            _iso2Codes[row['id']] = row['iso2Code']
-            _localized_metadata[w.lang]['capitalCity:'+row['id']] = (row['capitalCity'].strip() or _empty_meta_value)
+    # here, we update codes and city translations simultaneously
+    for row in countries:
+        iso2Codes[row['id']] = row['iso2Code']
+        localized['capitalCity:'+row['id']] = (row['capitalCity'].strip() or _empty_meta_value)
 
-            db = {'aggregate': row['region']['id'] == 'NA'}
-            for key in ['longitude', 'latitude']:
-                db[key] = float(row[key]) if len(row[key]) else None
+        db = {'aggregate': row['region']['id'] == 'NA'}
+        for key in ['longitude', 'latitude']:
+            db[key] = float(row[key]) if len(row[key]) else None
 
-            for key in ['region', 'adminregion', 'lendingType', 'incomeLevel']:
-                db[key] = _empty_meta_value if db['aggregate'] else (row[key]['id'] or _empty_meta_value)
+        for key in _class_columns:
+            db[key] = _empty_meta_value if db['aggregate'] else (row[key]['id'] or _empty_meta_value)
 
-            _class_data[row['id']] = db
-            if db['aggregate']:
-                _aggs.add(row['id'])
-                _aggs.add(row['iso2Code'])
+        class_data[row['id']] = db
+        if db['aggregate']:
+            aggs.add(row['id'])
+            aggs.add(row['iso2Code'])
 
-        # add one dummy that we can match to unrecognized economy codes
-        db = _class_data['USA']
-        _class_data['___'] = {k:None for k in db.keys()}
+    # add one dummy that we can match to unrecognized economy codes
+    db = class_data['USA']
+    class_data['___'] = {k:None for k in db.keys()}
 
-    else:
-        # else, just update city codes
-        for row in w.fetch(url):
-            _localized_metadata[w.lang]['capitalCity:'+row['id']] = (row['capitalCity'].strip() or _empty_meta_value)
-            
+    return (localized, iso2Codes, class_data, aggs)
 
 def iso2(code):
     '''Return the iso2 code for a given iso3 code.
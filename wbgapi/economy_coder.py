@@ -4,25 +4,47 @@ spellings and conventions.
 '''
 
 import wbgapi as w
-import yaml
+from . import utils
+import hashlib
+import json
 import os
 import re
+import threading
 
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
+yaml = utils.lazy_import('yaml')
+pd = utils.lazy_import('pandas')
 
 _lookup_data = None
 _coder_names = None
-
-def coder(name, summary=False, debug=None):
+_coder_source = None    # where names came from: 'snapshot' (bundled with wbgapi), 'file' or 'api'
+_matcher = None
+_restored_names = None  # names from the API restored by wbgapi.catalog, installed on first use
+_load_lock = threading.Lock()
+
+_lookup_path = os.path.join(os.path.dirname(__file__), 'lookup-data.yaml')
+_snapshot_version = 1
+
+_coded = {}             # memoized codes, keyed by prepared name
+_fuzzy_coded = {}       # memoized fuzzy matches, keyed by prepared name
+_fuzzy_index = None     # trigram index, built the first time fuzzy matching is used
+_coded_max = 100000     # maximum size of _coded before it is reset
+
+_re_us_uk = re.compile(r'\((u\.?s\.?|u\.?k\.?)\)')
+_re_parenthetical = re.compile(r'\s*\(.*\)')
+_re_superfluous = re.compile(r'[^\w&]')
+_re_word = re.compile(r'\w+')
+_re_fuzzy_special = re.compile(r'[^\w &]')
+
+def coder(name, summary=False, debug=None, processes=None, fuzzy=None):
     '''Return the country code for a given country name, based on common spellings and conventions.
     This function is intended to make it easier to convert country names to ISO3 codes.
 
     This feature is English-only and still in development. You can extend the matching algorithm
     by editing the `lookup-data.yaml` file.
 
+    Economy names come from a snapshot bundled with wbgapi, so the coder works offline. Call
+    wbgapi.economy_coder.refresh() (or refresh_async()) to update them from the API.
+
     Arguments:
 
         name:       a country name as a string, or an iterable object of name strings
@@ -31,12 +53,20 @@ def coder(name, summary=False, debug=None):
 
         debug:      a list of ISO codes for which to print debug output
 
+        processes:  if name is a pandas Series, code its distinct values in this many worker processes.
+                    This only pays off for very large numbers of distinct names
+
+        fuzzy:      minimum similarity (0 to 1) for names that the rules don't match to be coded by fuzzy
+                    matching against WBG names and aliases, e.g., 0.8. Pass None to disable fuzzy matching.
+                    Similarity scores of fuzzy matches are shown in the Coder report
+
     Returns:
         If `name` is a string then the function returns the corresponding ISO3 code, or None if the code
         can't be ascertained.
 
         If `name` is a pandas Series, the function returns a pandas Series with the same index. Note that
-        if the summary is True then the function always returns a Coder object.
+        if the summary is True then the function always returns a Coder object. Each distinct value in
+        the Series is only coded once.
 
         If `name` is any other iterable object, the function returns a Coder object. Coder is a dict subclass
         with some sugar to produce a nice command line (or jupyter notebook) report. Country names that
@@ -50,135 +80,545 @@ def coder(name, summary=False, debug=None):
         print(wbgapi.economy.lookup('Swaziland')) # prints 'SWZ'
 
         print(wbgapi.economy.lookup(['Canada', 'Toronto']))   # prints {'Canada': 'CAN', 'Toronto': None}
+
+        print(wbgapi.economy.coder(['Brazill', 'Argentine Republic'], fuzzy=0.6))
     '''
-    global _lookup_data, _coder_names
+    if type(name) is str:
+        name = [name]
+        is_list = False
+    else:
+        is_list = True
 
-    def prepare(s, clean=False, magicRegex=False):
+    _load()
 
-        s = s.lower()
-        if clean:
-            # should be False if the string is regex-capable
+    if summary == False and utils.imported('pandas') and type(name) is pd.core.series.Series:
+        return _code_series(name, debug, processes, fuzzy)
 
-            # this next trick is strips the container parentheses from "... (US|UK)"
-            # and leaves the inner part. Need this for the Virgin Islands since,
-            # before we remove parenthetical text entirely
-            s = re.sub(r'\((u\.?s\.?|u\.?k\.?)\)', lambda t: t.group(1).replace('.',''), s)
+    # each distinct name is only coded once
+    results = w.Coder({k: None for k in name})
+    scores = {}
+    for t in list(results.keys()):
+        (results[t], score) = _code_name(t, debug, fuzzy)
+        if score is not None:
+            scores[t] = score
 
-            s = re.sub(r'\s*\(.*\)', '', s)         # remove parenthetical text
-            s = s.replace("'", '')                  # remove apostrophes
-            s = re.sub(r'[^\w&]', ' ', s)           # convert remaining superflous chars to spaces
+    if fuzzy:
+        results.scores = scores
 
-        s = s.strip()
+    if is_list or summary:
+        if summary and type(results) is w.Coder:
+                results = w.Coder(dict(filter(lambda x: x[0].lower() != _coder_names.get(x[1],'').lower() if x[1] else True, results.items())))
+                if fuzzy:
+                    results.scores = {k:v for k,v in scores.items() if k in results}
 
-        if magicRegex:
-            # converts 'and' to (and|&), 'st' to (st|saint)
-            s = re.sub(r'\band\b', r'(and|\&)', s)
-            s = re.sub(r'\bst\b', r'(st|saint)', s)
-            s = re.sub(r'\s+', r'\\s+', s)
+        return results
 
-        return s
+    return results.get(name[0])
 
-    if _lookup_data is None:
-        _lookup_data = []
-        _coder_names = {}
-        user_data = yaml.safe_load(open(os.path.join(os.path.dirname(__file__), 'lookup-data.yaml'), 'r'))
+class _Matcher():
+    '''Compiled form of the lookup table. Exact (mode 0) entries are hashed, and regex entries are indexed by
+    the literal text they must start with, so only a few candidates are searched for each name. The result
+    is the same as trying each entry in turn: the first entry that matches wins, and exclusions (mode 2)
+    disqualify later entries for the same economy
+    '''
 
-        for row in w.fetch('country/all', lang='en'):
-            if row['region']['id'] == 'NA':
-                continue # ignore aggregates
+    def __init__(self, lookup_data):
+
+        self.exact = {}         # text => [(position, id)]
+        self.excludes = []      # [(position, id, regex)]
+        self.entries = []       # [(position, id, regex)] in order
+        self.prefixes = {}      # literal prefix => [index of entry]
+        self.unindexed = []     # indexes of entries without a literal prefix
+        for pos,(pattern,id,mode,order) in enumerate(lookup_data):
+            if mode == 0:
+                self.exact.setdefault(pattern, []).append((pos, id))
+            elif mode == 2:
+                self.excludes.append((pos, id, re.compile(pattern)))
+            else:
+                prefix = _literal_prefix(pattern)
+                if prefix:
+                    self.prefixes.setdefault(prefix, []).append(len(self.entries))
+                else:
+                    self.unindexed.append(len(self.entries))
 
-            _coder_names[row['id']] = row['name']
+                self.entries.append((pos, id, re.compile(pattern)))
 
-            obj = user_data.get(row['id'], {})
-            # convert ordinary arrays to objects - for most cases this simplifies the yaml
-            if type(obj) is list:
-                obj = {'patterns': obj}
+        self.lengths = sorted(set(map(len, self.prefixes.keys())))
 
-            try:
-                order = obj.get('order', 10)
-            except:
-                print(obj)
-                raise
+    def match(self, t):
+        '''Return the code for a prepared name, or None
+        '''
 
-            _lookup_data.append((row['id'].lower(), row['id'], 0, order))
-            _lookup_data.append(('\\b{}\\b'.format(prepare(row['name'], clean=True, magicRegex=True)), row['id'], 1, order))
-            for row2 in obj.get('patterns',[]):
-                if row2[0:1] == ':':
-                    # treat as an exact case-insensitive string match
-                    _lookup_data.append((row2[1:].lower(), row['id'], 0, order))
-                elif row2[0:1] == '~':
-                    # treat as regex string, but EXCLUDE this pattern
-                    _lookup_data.append(('\\b{}\\b'.format(prepare(row2[1:], clean=False, magicRegex=True)), row['id'], 2, order))
-                else:
-                    # treat as a regex string which can match on any word boundary
-                    _lookup_data.append(('\\b{}\\b'.format(prepare(row2, clean=False, magicRegex=True)), row['id'], 1, order))
+        # economies excluded by mode 2 entries, and the position from which they are excluded
+        excluded = {}
+        for pos,id,rx in self.excludes:
+            if id not in excluded and rx.search(t):
+                excluded[id] = pos
 
-        _lookup_data.sort(key=lambda x: x[3])
+        def valid(pos, id):
+            return id not in excluded or pos < excluded[id]
 
-    if type(name) is str:
-        name = [name]
-        is_list = False
-    else:
-        is_list = True
+        best = None
+        for pos,id in self.exact.get(t, []):
+            if valid(pos, id):
+                best = (pos, id)
+                break
 
-    if summary == False and pd is not None and type(name) is pd.core.series.Series:
-        results = pd.Series(index=name.index, dtype=object, name='iso3')
-    else:
-        results = w.Coder({k: None for k in name})
-
-    n = 0
-    for t in name:
-        excludes = []
-        t2 = prepare(t, clean=True, magicRegex=False)
-        for pattern,id,mode,order in _lookup_data:
-            if debug and id in debug:
-                print('{}: matching "{}"/{} against "{} > {}"'.format(id, pattern, mode, t, t2))
-
-            if id in excludes:
-                if debug and id in debug:
-                    print('{}: excluded'.format(id))
-            elif mode == 2 and re.search(pattern, t2):
-                # all further patterns for this id will be ignored
-                excludes.append(id)
-            elif mode == 1 and re.search(pattern, t2):
-                if type(results) is w.Coder:
-                    results[t] = id
-                else:
-                    results.iloc[n] = id
+        # entries whose prefix begins a word in t
+        candidates = set(self.unindexed)
+        for word in _re_word.findall(t):
+            for n in self.lengths:
+                if n > len(word):
+                    break
+
+                candidates.update(self.prefixes.get(word[:n], []))
+
+        for i in sorted(candidates):
+            (pos, id, rx) = self.entries[i]
+            if best is not None and pos > best[0]:
                 break
-            elif mode == 0 and pattern == t2:
-                if type(results) is w.Coder:
-                    results[t] = id
-                else:
-                    results.iloc[n] = id
+
+            if valid(pos, id) and rx.search(t):
+                best = (pos, id)
                 break
 
+        return best[1] if best else None
 
-        n += 1
+def _literal_prefix(pattern):
+    '''Internal function that returns the word characters that any match of a lookup pattern must begin with,
+    or '' if there are none. Patterns are delimited with \\b, so matches always begin at the start of a word
+    '''
 
-    if is_list or summary:
-        if summary and type(results) is w.Coder:
-                results = w.Coder(dict(filter(lambda x: x[0].lower() != _coder_names.get(x[1],'').lower() if x[1] else True, results.items())))
+    p = pattern[2:] if pattern.startswith('\\b') else pattern
+    depth = 0
+    for c in p:
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            # alternatives may begin differently
+            return ''
 
-        return results
+    prefix = ''
+    for i,c in enumerate(p):
+        if not (c.isalnum() or c == '_') or p[i+1:i+2] in ['?', '*', '{']:
+            break
+
+        prefix += c
+
+    return prefix
+
+def _code_series(name, debug=None, processes=None, fuzzy=None):
+    '''Internal function that codes a pandas Series. Distinct values are coded once and mapped back
+    '''
+
+    codes, uniques = pd.factorize(name)
+    if debug:
+        ids = [_code_name(t, debug, fuzzy)[0] for t in uniques]
+    elif processes and len(uniques) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        uniques = list(uniques)
+        size = -(-len(uniques) // (processes * 4))
+        chunks = [uniques[i:i+size] for i in range(0, len(uniques), size)]
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(_matcher, _lookup_data, _coder_names)) as executor:
+            ids = [id for chunk in executor.map(_code_chunk, chunks, [fuzzy] * len(chunks)) for id in chunk]
+    else:
+        ids = [_code_name(t, None, fuzzy)[0] for t in uniques]
+
+    # missing values have a code of -1, which takes the last element. Unmatched names are NaN, as are missing values
+    ids = [float('nan') if id is None else id for id in ids] + [float('nan')]
+    return pd.Series(ids, dtype=object).take(codes).set_axis(name.index).rename('iso3')
+
+def _init_worker(matcher, lookup_data, coder_names):
+    '''Internal function that initializes a worker process with the parent's lookup table, so that it
+    doesn't need to build its own
+    '''
+
+    global _matcher, _lookup_data, _coder_names
+
+    (_matcher, _lookup_data, _coder_names) = (matcher, lookup_data, coder_names)
+
+def _code_chunk(names, fuzzy=None):
+    '''Internal function that codes a list of names in a worker process
+    '''
+
+    return [_code_name(t, None, fuzzy)[0] for t in names]
+
+def _code_name(name, debug=None, fuzzy=None):
+    '''Internal function that codes a name with the rules, then by fuzzy matching if fuzzy is a threshold
+
+    Returns:
+        a tuple of (code, score). score is the similarity of a fuzzy match, and None otherwise
+    '''
+
+    id = _match_debug(name, debug) if debug else _code(_matcher, name)
+    if id is not None or not fuzzy:
+        return (id, None)
+
+    (id, score) = _code_fuzzy(name)
+    if id is None or score < fuzzy:
+        return (None, None)
+
+    return (id, score)
+
+def _code_fuzzy(name):
+    '''Internal function that returns the best fuzzy match for a name and its similarity, memoized on the prepared name
+    '''
+
+    global _fuzzy_index
+
+    t = _prepare(name, clean=True, magicRegex=False)
+    best = _fuzzy_coded.get(t)
+    if best is None:
+        index = _fuzzy_index
+        if index is None:
+            index = _fuzzy_index = _FuzzyIndex(_coder_names, _lookup_data)
+
+        if len(_fuzzy_coded) >= _coded_max:
+            _fuzzy_coded.clear()
+
+        best = _fuzzy_coded[t] = index.match(t)
+
+    return best
+
+class _FuzzyIndex():
+    '''Inverted index of the character trigrams of WBG names and the plain-text aliases in the lookup table.
+    Names are compared by the Dice coefficient of their trigram sets, and only aliases that share at least
+    one trigram with the name are scored
+    '''
+
+    def __init__(self, names, lookup_data):
+
+        self.aliases = []       # [(id, number of trigrams)]
+        self.postings = {}      # trigram => [index of alias]
+        for id,name in names.items():
+            self._add(_prepare(name, clean=True, magicRegex=False), id)
+
+        for pattern,id,mode,order in lookup_data:
+            if mode == 0 and pattern != id.lower():
+                # ISO codes are too short to compare
+                self._add(pattern, id)
+            elif mode == 1:
+                alias = _fuzzy_alias(pattern)
+                if alias:
+                    self._add(alias, id)
+
+    def _add(self, text, id):
+
+        grams = _trigrams(text)
+        if not grams:
+            return
+
+        n = len(self.aliases)
+        self.aliases.append((id, len(grams)))
+        for g in grams:
+            self.postings.setdefault(g, []).append(n)
+
+    def match(self, t):
+        '''Return a tuple of (code, similarity) for the most similar alias of a prepared name. The code is None
+        if no alias is similar or if the most similar aliases belong to different economies
+        '''
+
+        grams = _trigrams(t)
+        shared = {}
+        for g in grams:
+            for n in self.postings.get(g, []):
+                shared[n] = shared.get(n, 0) + 1
+
+        best = (None, 0.0)
+        for n,count in shared.items():
+            (id, size) = self.aliases[n]
+            score = 2.0 * count / (len(grams) + size)
+            if score > best[1]:
+                best = (id, score)
+            elif score == best[1] and id != best[0]:
+                best = (None, score)
+
+        return best
+
+def _trigrams(text):
+    '''Internal function that returns the set of character trigrams of a prepared name, including word boundaries
+    '''
+
+    text = ' {} '.format(' '.join(text.split()))
+    return {text[i:i+3] for i in range(len(text) - 2)} if len(text) > 2 else set()
+
+def _fuzzy_alias(pattern):
+    '''Internal function that converts a lookup pattern to plain text for fuzzy matching, or returns None if
+    the pattern uses regular expressions beyond the sugar added by _prepare
+    '''
+
+    s = pattern
+    if s.startswith('\\b') and s.endswith('\\b'):
+        s = s[2:-2]
+
+    s = s.replace('(and|\\&)', 'and').replace('(st|saint)', 'st').replace('\\s+', ' ')
+    if _re_fuzzy_special.search(s):
+        return None
+
+    return s
+
+def _code(matcher, name):
+    '''Internal function that codes a single name, memoized on the prepared name
+    '''
+
+    t = _prepare(name, clean=True, magicRegex=False)
+    id = _coded.get(t, _coded)
+    if id is _coded:
+        if len(_coded) >= _coded_max:
+            _coded.clear()
+
+        id = _coded[t] = matcher.match(t)
+
+    return id
+
+def _match_debug(name, debug):
+    '''Internal function that codes a name by trying each lookup entry in turn, printing debug output
+    for economies in debug
+    '''
+
+    excludes = []
+    t2 = _prepare(name, clean=True, magicRegex=False)
+    for pattern,id,mode,order in _lookup_data:
+        if id in debug:
+            print('{}: matching "{}"/{} against "{} > {}"'.format(id, pattern, mode, name, t2))
+
+        if id in excludes:
+            if id in debug:
+                print('{}: excluded'.format(id))
+        elif mode == 2 and re.search(pattern, t2):
+            # all further patterns for this id will be ignored
+            excludes.append(id)
+        elif mode == 1 and re.search(pattern, t2):
+            return id
+        elif mode == 0 and pattern == t2:
+            return id
+
+    return None
+
+def _prepare(s, clean=False, magicRegex=False):
+    '''Internal function that normalizes a name for matching (clean=True) or converts a lookup-data.yaml
+    pattern to a regex (magicRegex=True)
+    '''
+
+    s = s.lower()
+    if clean:
+        # should be False if the string is regex-capable
+
+        # this next trick is strips the container parentheses from "... (US|UK)"
+        # and leaves the inner part. Need this for the Virgin Islands since,
+        # before we remove parenthetical text entirely
+        s = _re_us_uk.sub(lambda t: t.group(1).replace('.',''), s)
+
+        s = _re_parenthetical.sub('', s)        # remove parenthetical text
+        s = s.replace("'", '')                  # remove apostrophes
+        s = _re_superfluous.sub(' ', s)         # convert remaining superflous chars to spaces
+
+    s = s.strip()
+
+    if magicRegex:
+        # converts 'and' to (and|&), 'st' to (st|saint)
+        s = re.sub(r'\band\b', r'(and|\&)', s)
+        s = re.sub(r'\bst\b', r'(st|saint)', s)
+        s = re.sub(r'\s+', r'\\s+', s)
+
+    return s
+
+def refresh():
+    '''Refresh economy names from the API and rebuild the lookup table. By default the coder uses names from
+    a snapshot bundled with wbgapi, so it works offline, but economies added to the API since the snapshot
+    are not recognized until you call this function (or refresh the catalog, see wbgapi.catalog)
+    '''
+
+    names = {}
+    for row in w.fetch('country/all', lang='en'):
+        if row['region']['id'] == 'NA':
+            continue # ignore aggregates
+
+        names[row['id']] = row['name']
+
+    _install(names, _build_lookup(names, _read_user_data()), 'api')
+
+def refresh_async():
+    '''Refresh economy names from the API in a background thread (see refresh). The coder continues to
+    use the current names in the meantime
+
+    Returns:
+        the thread object
+    '''
+
+    def run():
+        try:
+            refresh()
+        except Exception:
+            # keep using the current names if the API is unavailable
+            pass
+
+    thread = threading.Thread(target=run, name='wbgapi-coder-refresh', daemon=True)
+    thread.start()
+    return thread
+
+def save(path):
+    '''Save the coder's economy names and lookup table to a snapshot file, which load() can use later
+    without API requests
+
+    Arguments:
+        path:       file name
+    '''
+
+    _load()
+    data = {'version': _snapshot_version, 'names': _coder_names, 'lookup_hash': _lookup_hash(), 'lookup': _lookup_data}
+    with open(path, 'w') as fp:
+        json.dump(data, fp, indent=0)
+
+def load(path):
+    '''Load economy names and the lookup table from a snapshot file created with save()
+
+    Arguments:
+        path:       file name
+    '''
+
+    data = _read_snapshot(path)
+    _install_snapshot(data, 'file')
+
+def _load():
+    '''Internal function that builds the lookup table and its matcher on first use
+
+    Returns:
+        a _Matcher object
+    '''
+
+    with _load_lock:
+        if _matcher is None:
+            if _restored_names:
+                _install(_restored_names, _build_lookup(_restored_names, _read_user_data()), 'api')
+            else:
+                _install_snapshot(_read_snapshot(os.path.join(os.path.dirname(__file__), 'coder-snapshot.json')), 'snapshot')
+
+    return _matcher
+
+def _restore(names):
+    '''Internal function that uses names from the API saved by wbgapi.catalog, unless the coder has
+    already refreshed its own
+    '''
+
+    global _restored_names, _matcher
+
+    if _coder_source != 'api':
+        _restored_names = names
+        _matcher = None
+
+def _api_names():
+    '''Internal function that returns names retrieved from the API, if any, for wbgapi.catalog
+    '''
+
+    return _coder_names if _coder_source == 'api' else _restored_names
+
+def _install_snapshot(data, source):
+    '''Internal function that installs names and the lookup table from a snapshot. The precompiled lookup
+    table is used unless lookup-data.yaml has changed since the snapshot was made
+    '''
+
+    names = data['names']
+    if data.get('lookup_hash') == _lookup_hash():
+        lookup = [tuple(row) for row in data['lookup']]
+    else:
+        lookup = _build_lookup(names, _read_user_data())
+
+    _install(names, lookup, source)
+
+def _install(names, lookup, source):
+    '''Internal function that replaces the coder's names and lookup table
+    '''
+
+    global _lookup_data, _coder_names, _coder_source, _matcher, _fuzzy_index
+
+    matcher = _Matcher(lookup)
+    (_lookup_data, _coder_names, _coder_source) = (lookup, names, source)
+    _coded.clear()
+    _fuzzy_coded.clear()
+    _fuzzy_index = None
+    _matcher = matcher
+
+def _read_snapshot(path):
+
+    with open(path, 'r') as fp:
+        data = json.load(fp)
+
+    if data.get('version') != _snapshot_version:
+        raise ValueError('{}: unsupported coder snapshot version'.format(path))
+
+    return data
+
+def _read_user_data():
+
+    return yaml.safe_load(open(_lookup_path, 'r'))
+
+def _lookup_hash():
+    '''Internal function that returns a hash of lookup-data.yaml, to detect changes
+    '''
+
+    with open(_lookup_path, 'rb') as fp:
+        return hashlib.sha1(fp.read()).hexdigest()
+
+def _build_lookup(names, user_data):
+    '''Internal function that builds the lookup table from economy names (a dict keyed by ISO3 code) and
+    the contents of lookup-data.yaml
+
+    Returns:
+        a list of (pattern, id, mode, order) tuples in matching order
+    '''
+
+    lookup = []
+    for id,name in names.items():
+        obj = user_data.get(id, {})
+        # convert ordinary arrays to objects - for most cases this simplifies the yaml
+        if type(obj) is list:
+            obj = {'patterns': obj}
+
+        try:
+            order = obj.get('order', 10)
+        except:
+            print(obj)
+            raise
+
+        lookup.append((id.lower(), id, 0, order))
+        lookup.append(('\\b{}\\b'.format(_prepare(name, clean=True, magicRegex=True)), id, 1, order))
+        for row2 in obj.get('patterns',[]):
+            if row2[0:1] == ':':
+                # treat as an exact case-insensitive string match
+                lookup.append((row2[1:].lower(), id, 0, order))
+            elif row2[0:1] == '~':
+                # treat as regex string, but EXCLUDE this pattern
+                lookup.append(('\\b{}\\b'.format(_prepare(row2[1:], clean=False, magicRegex=True)), id, 2, order))
+            else:
+                # treat as a regex string which can match on any word boundary
+                lookup.append(('\\b{}\\b'.format(_prepare(row2, clean=False, magicRegex=True)), id, 1, order))
+
+    lookup.sort(key=lambda x: x[3])
+    return lookup
 
-    return results.get(name[0])
-            
 def coder_report(economies):
 
     global _coder_names
 
-    rows = [('ORIGINAL NAME', 'WBG NAME', 'ISO_CODE')]
+    # fuzzy matches are reported with their similarity scores
+    scores = getattr(economies, 'scores', None)
+
+    rows = [('ORIGINAL NAME', 'WBG NAME', 'ISO_CODE', 'FUZZY SCORE')]
     for k,v in economies.items():
         if v:
             wb_name = _coder_names.get(v, '')
         else:
             wb_name = ''
 
-        rows.append((k, wb_name, v))
+        score = scores.get(k) if scores else None
+        rows.append((k, wb_name, v, '{:.2f}'.format(score) if score is not None else ''))
 
     output = []
     for row in rows:
-        output.append([row[0], row[1], row[2]])
+        output.append([row[0], row[1], row[2], row[3]] if scores is not None else [row[0], row[1], row[2]])
     
     return output
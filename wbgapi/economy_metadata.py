@@ -3,8 +3,9 @@
 '''
 
 import wbgapi as w
+from . import utils
 
-def fetch(id,series=[],db=None):
+def fetch(id,series=[],db=None,fields=None):
     '''Return metadata for the specified economy
 
     Arguments:
@@ -16,13 +17,15 @@ def fetch(id,series=[],db=None):
 
         db:         database; pass None to access the global database
 
+        fields:     optional name or list of economy metadata fields to return, e.g., 'SpecialNotes'.
+                    Other fields are discarded as they are read. Pass None for all fields
+
     Returns:
         a generator which generates Metadata objects. If series/economy metadata
         is requested it will be stored on the 'series' property of the object.
 
     Notes:
-        Passing a large series list will be very resource intense and inefficient. It might be
-        better to call series.metadata.fetch() with a relatively small list of countries
+        Series-economy metadata for all economies is requested together (see country_series)
 
     Example:
         for meta = wbgapi.economy.metadata.fetch(['COL', 'BRA']):
@@ -36,30 +39,22 @@ def fetch(id,series=[],db=None):
     if not w.source.has_metadata(db):
         return None
 
-    if type(series) is str:
-        if series == 'all':
-            # could be huge
-            series = [row['id'] for row in w.series.list()]
-        else:
-            series = [series]
-
     # as far as I can tell even for databases where the dimension is called 'economy' or something else the metadata API still 
     # wants 'country' as a parameter
-    for row in w.metadata('sources/{source}/country/{economy}/metadata', ['economy'], source=db, economy=w.queryParam(id, 'economy', db=db)):
+    rows = list(w.metadata('sources/{source}/country/{economy}/metadata', ['economy'], fields=fields, source=db, economy=w.queryParam(id, 'economy', db=db)))
+    cs = {}
+    if series and rows:
+        for (e,s),v in country_series([row.id for row in rows], series, db=db).items():
+            cs.setdefault(e, {})[s] = v
+
+    for row in rows:
         if series:
-            row.series = {}
-            # requests for non-existing data throw malformed responses so we must catch for them
-            try:
-                cs = ';'.join(['{}~{}'.format(row.id,elem) for elem in series[n:n+pg_size]])
-                for row2 in w.metadata('sources/{source}/Country-Series/{series}/metadata', ['series'], source=db, series=cs):
-                    row.series[row2.id.split('~')[1]] = row2.metadata['Country-Series']
-            except:
-                pass
+            row.series = cs.get(row.id, {})
 
         yield row
 
 
-def get(id,series=[], db=None):
+def get(id,series=[], db=None, fields=None):
     '''Retrieve a single metadata record
 
     Arguments:
@@ -69,6 +64,8 @@ def get(id,series=[], db=None):
 
         db:         database; pass None to access the global database
 
+        fields:     optional name or list of economy metadata fields to return
+
     Returns:
         A Metadata object. If series/economy metadata is requested it will be stored on the
         'series' property of the object.
@@ -77,5 +74,82 @@ def get(id,series=[], db=None):
         print(wbgapi.economy.metadata.get('COL'))
     '''
     
-    for row in fetch(id, series, db):
+    for row in fetch(id, series, db, fields):
         return row
+
+def country_series(economy='all', series='all', db=None):
+    '''Return series-economy (Country-Series) metadata for every combination of economies and series
+
+    Arguments:
+        economy:    an economy identifier or list-like
+
+        series:     a series identifier or list-like
+
+        db:         database; pass None to access the global database
+
+    Returns:
+        a dict of metadata text keyed by (economy, series) tuples. Combinations without metadata are omitted
+
+    Example:
+        notes = wbgapi.economy.metadata.country_series(['BRA', 'ARG'], ['SP.POP.TOTL', 'NY.GDP.PCAP.CD'])
+        print(notes.get(('BRA', 'SP.POP.TOTL')))
+
+    Notes:
+        Combinations are packed into as few requests as the API's URL limit allows, and requests are sent
+        concurrently (see wbgapi.max_workers). Passing 'all' for both dimensions is possible, but means
+        thousands of requests for large databases.
+    '''
+
+    if db is None:
+        db = w.db
+
+    result = {}
+    if not w.source.has_metadata(db):
+        return result
+
+    keys = ['{}~{}'.format(e, s) for e in utils.ids(economy, 'economy', db) for s in utils.ids(series, 'series', db)]
+    if not keys:
+        return result
+
+    # requests for non-existing data throw malformed responses: _metadata_chunks skips those keys
+    url = 'sources/{source}/Country-Series/{series}/metadata'
+    for row in w._metadata_chunks(url, 'series', concepts='Country-Series', fields='Country-Series', source=db, series=';'.join(keys)):
+        if 'Country-Series' in row.metadata:
+            (e, s) = row.id.split('~')
+            result[(e, s)] = row.metadata['Country-Series']
+
+    return result
+
+def CountrySeriesFrame(economy='all', series='all', columns='series', db=None):
+    '''Return series-economy (Country-Series) metadata as a pandas DataFrame, with economies and
+    series as the rows and columns
+
+    Arguments:
+        economy:    an economy identifier or list-like
+
+        series:     a series identifier or list-like
+
+        columns:    dimension for the columns: 'series' or 'economy'
+
+        db:         database; pass None to access the global database
+
+    Returns:
+        a pandas DataFrame of metadata text. Economies or series without any metadata are omitted
+
+    Example:
+        df = wbgapi.economy.metadata.CountrySeriesFrame(wbgapi.region.members('SAS'), ['SP.POP.TOTL', 'NY.GDP.PCAP.CD'])
+    '''
+
+    if columns not in ['series', 'economy']:
+        raise ValueError('columns must be \'series\' or \'economy\'')
+
+    backend = w.frames.get()
+    index = 'economy' if columns == 'series' else 'series'
+
+    data = {'economy': [], 'series': [], 'value': []}
+    for (e,s),v in country_series(economy, series, db=db).items():
+        data['economy'].append(e)
+        data['series'].append(s)
+        data['value'].append(v)
+
+    return backend.wide(data, [index], columns)
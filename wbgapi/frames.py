@@ -0,0 +1,249 @@
+'''Frame backends for the functions that return data frames
+
+Functions like data.DataFrame, data.FlatFrame, economy.DataFrame and wbgapi.Series
+collect their results in columnar buffers (a dict of equal-length lists) and then
+pass them to a backend which builds the actual frame. pandas is the default. The
+polars backend returns polars DataFrames; since polars has no row index, index
+dimensions are returned as the leading columns instead.
+
+You can change the backend globally:
+
+    wbgapi.frame_backend = 'polars'
+
+Or add your own by adding an object with the same methods as PandasBackend to
+the backends dict.
+'''
+
+import wbgapi as w
+from . import utils
+
+# pandas and polars are imported on first use
+pd = utils.lazy_import('pandas')
+pl = utils.lazy_import('polars')
+
+ts_suffix = ':T'    # suffix for time columns (see data.DataFrame)
+
+class PandasBackend():
+    '''Builds pandas objects from columnar buffers
+    '''
+
+    name = 'pandas'
+
+    def available(self):
+        return bool(pd)
+
+    def flat(self, data, columns):
+        '''Return a flat frame (1 row per observation)
+
+        Arguments:
+            data:       dict of lists
+
+            columns:    column order
+        '''
+
+        return pd.DataFrame(data, columns=columns)
+
+    def wide(self, data, index, columns, timeColumns=False, labels=None):
+        '''Return a 2-dimensional frame
+
+        Arguments:
+            data:           dict of lists: must include the dimensions in index and columns and 'value'. Also '_time' if
+                            timeColumns is True, and a list for each label column
+
+            index:          list of index dimensions
+
+            columns:        column dimension
+
+            timeColumns:    add extra columns for the time value of each observation
+
+            labels:         None or a dict of label columns for the index, keyed by the column name in data
+        '''
+
+        if len(data['value']) == 0:
+            return self._empty(index, labels)
+
+        df = pd.DataFrame(data)
+
+        # first observations take precedence over subsequent ones, except that non-empty values take precedence over empty ones
+        df = df.iloc[df['value'].isna().argsort(kind='stable')].drop_duplicates(index + [columns], keep='first')
+        result = df.pivot(index=index, columns=columns, values='value')
+        if timeColumns:
+            t = df.pivot(index=index, columns=columns, values='_time')
+            t.columns = [str(c) + ts_suffix for c in t.columns]
+            result = result.join(t)
+
+        result.columns.name = None
+        result.sort_index(axis=0, inplace=True)
+        result.sort_index(axis=1, inplace=True)
+        if labels:
+            # rows are sorted by index with or without labels, so partitioned requests (see data.LazyFrame) give the same result
+            df2 = df.drop_duplicates(index, keep='first').set_index(index)[list(labels.keys())].rename(columns=labels)
+            return df2.join(result).sort_index()
+
+        return result
+
+    def series(self, keys, values, key, name):
+        '''Return a pandas Series
+
+        Arguments:
+            keys:       index values
+
+            values:     Series values
+
+            key:        index name (ignored)
+
+            name:       Series name
+        '''
+
+        return pd.Series(dict(zip(keys, values)), name=name)
+
+    def table(self, data, index, columns, categories=[]):
+        '''Return a frame indexed by one of its columns
+
+        Arguments:
+            data:       dict of lists
+
+            index:      name of the index column
+
+            columns:    order of the remaining columns
+
+            categories: columns to convert to categorical values
+        '''
+
+        df = pd.DataFrame(data, columns=[index] + columns).set_index(index)
+        df = df.mask(df.isna())     # None to NaN
+        for k in categories:
+            df[k] = df[k].astype('category')
+
+        return df
+
+    def concat(self, frames, keys, name):
+        '''Concatenate frames, adding an outer index level
+
+        Arguments:
+            frames:     list of frames
+
+            keys:       values for the new level, one per frame
+
+            name:       name of the new level
+        '''
+
+        return pd.concat(frames, keys=keys, names=[name])
+
+    def combine(self, frames, index):
+        '''Concatenate frames with the same columns row-wise
+
+        Arguments:
+            frames:     list of frames
+
+            index:      list of index dimensions
+        '''
+
+        return pd.concat(frames).sort_index()
+
+    def _empty(self, index, labels):
+
+        if len(index) > 1:
+            i = [[]] * len(index)
+            df = pd.DataFrame(index=pd.MultiIndex(levels=i, codes=i, names=tuple(index)))
+        else:
+            df = pd.DataFrame()
+            df.index.name = index[0]
+
+        if labels:
+            for k in labels.values():
+                df[k] = None
+
+        return df
+
+class PolarsBackend():
+    '''Builds polars DataFrames from columnar buffers. Index dimensions become the
+    leading columns of the frame. See PandasBackend for the arguments
+    '''
+
+    name = 'polars'
+
+    def available(self):
+        return bool(pl)
+
+    def flat(self, data, columns):
+
+        return self._frame(data).select(columns)
+
+    def wide(self, data, index, columns, timeColumns=False, labels=None):
+
+        if len(data['value']) == 0:
+            return pl.DataFrame({k: [] for k in index + list((labels or {}).values())})
+
+        df = self._frame(data).with_columns(pl.col('value').is_null().alias('_blank'))
+        df = df.sort('_blank', maintain_order=True).unique(subset=index + [columns], keep='first', maintain_order=True)
+
+        result = df.pivot(on=columns, index=index, values='value', sort_columns=True)
+        if timeColumns:
+            t = df.pivot(on=columns, index=index, values='_time', sort_columns=True)
+            t = t.rename({c: c + ts_suffix for c in t.columns if c not in index})
+            result = result.join(t, on=index, how='left')
+
+        result = result.sort(index).select(index + sorted([c for c in result.columns if c not in index]))
+        if labels:
+            df2 = df.unique(subset=index, keep='first', maintain_order=True).select(index + list(labels.keys())).rename(labels)
+            return df2.join(result, on=index, how='left').sort(index)
+
+        return result
+
+    def series(self, keys, values, key, name):
+
+        # the equivalent of a keyed Series in polars is a 2-column frame
+        return self._frame({key: keys, name: values})
+
+    def table(self, data, index, columns, categories=[]):
+
+        df = self._frame(data).select([index] + columns)
+        return df.with_columns([pl.col(k).cast(pl.Categorical) for k in categories])
+
+    def concat(self, frames, keys, name):
+
+        return pl.concat([df.select([pl.lit(key).alias(name), pl.all()]) for df,key in zip(frames, keys)], how='diagonal_relaxed')
+
+    def combine(self, frames, index):
+
+        return pl.concat(frames, how='diagonal_relaxed').sort(index)
+
+    def _frame(self, data):
+
+        # strict=False allows columns with both integers and floats, which the API often returns
+        return pl.DataFrame(data, strict=False)
+
+backends = {
+    'pandas': PandasBackend(),
+    'polars': PolarsBackend(),
+}
+
+def get(name=None):
+    '''Return the frame backend
+
+    Arguments:
+        name:       backend name. Pass None to use wbgapi.frame_backend
+
+    Returns:
+        a backend object
+    '''
+
+    if name is None:
+        name = w.frame_backend
+
+    backend = backends.get(name)
+    if backend is None:
+        raise ValueError('{} is not a frame backend'.format(name))
+
+    if not backend.available():
+        raise ModuleNotFoundError('you must install {} to use this feature'.format(backend.name))
+
+    return backend
+
+def require():
+    '''Raise an error if the frame backend isn't available. Functions that return frames call this before
+    querying the API, so that a missing package is reported before any data are requested
+    '''
+
+    get()
@@ -64,14 +64,11 @@ def members(id, param='region'):
         a set object of economy identifiers
 
     Notes:
-        the returned members may not match the economies in the current database since we access the universal region lists from the API
+        the returned members may not match the economies in the current database since we access the universal region lists from the API.
+        Members are calculated from cached economy classifications where possible; see wbgapi.economy.members
     '''
 
-    e = set()
-    for row in w.fetch('country', {param: id}):
-        e.add(row['id'])
-
-    return e
+    return w.economy._group_members(param, id)
 
 def Series(id='all', q=None, group=None, name='RegionName'):
     '''Return a pandas Series by calling list
@@ -0,0 +1,416 @@
+'''Local full-text search of database metadata
+
+The API's search endpoint is convenient but slow for interactive use. This module
+downloads series and economy metadata (and optionally footnotes) in bulk and builds
+an inverted index that answers queries locally, ranked with BM25. Queries are
+groups of words that must all appear in the same metadata field:
+
+    fossil fuel         both words, in any order
+    "fossil fuel"       the exact phrase
+    fuel*               words beginning with 'fuel'
+
+Words are case insensitive, and plurals are folded to the singular, so 'fossil fuel'
+also matches 'Fossil fuels'.
+
+Once an index is built (or loaded) for a database, wbgapi.search and wbgapi.search2
+use it instead of the API.
+
+Examples:
+    wbgapi.search_index.build()                 # index the current database
+    wbgapi.search('"fossil fuel" emission*')    # now local
+
+    index = wbgapi.search_index.build(db=6, footnotes=True)
+    index.save('ids-index.json')
+    index = wbgapi.search_index.load('ids-index.json')
+'''
+
+import wbgapi as w
+import bisect
+import json
+import math
+import re
+
+_indexes = {}       # indexes in use, keyed by database
+_format_version = 1
+
+_token = re.compile(r'\w+')
+_clause = re.compile(r'"([^"]*)"|(\S+)')
+
+class Index():
+    '''An inverted index of Metadata objects. Each field of each object is indexed as a separate document
+    '''
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, rows=[], db=None):
+        self.db = db
+        self.rows = []          # Metadata objects
+        self.docs = []          # (row, field) for each document
+        self.lengths = []       # number of tokens in each document
+        self.postings = {}      # term => {doc: [positions]}
+        self._terms = None      # sorted list of terms, for prefix queries
+        self.add(rows)
+
+    def add(self, rows):
+        '''Add Metadata objects to the index
+
+        Arguments:
+            rows:       an iterable of Metadata objects, e.g., from wbgapi.metadata()
+        '''
+
+        for row in rows:
+            n = len(self.rows)
+            self.rows.append(row)
+            for field,value in row.metadata.items():
+                if type(value) is not str:
+                    continue
+
+                doc = len(self.docs)
+                self.docs.append((n, field))
+                tokens = [_fold(t) for t in _token.findall(value.lower())]
+                self.lengths.append(len(tokens))
+                for pos,term in enumerate(tokens):
+                    self.postings.setdefault(term, {}).setdefault(doc, []).append(pos)
+
+        self._terms = None
+
+    def search(self, q, footnotes='none', brief=False, padding=80, highlight=True):
+        '''Search the index and return results as a print-friendly object
+
+        Arguments:
+            q:          search terms (see the module documentation)
+
+            footnotes:  how to treat footnotes: 'include', 'only', or 'none'
+
+            brief:      abbreviated output (don't print matching values)
+
+            padding:    approximate number of surrounding characters to include when displaying text matching
+                        the search terms. None returns the entire string
+
+            highlight:  mark matching words with asterisks
+
+        Returns:
+            a MetadataCollection
+        '''
+
+        terms = self._match_terms(q)
+        result = w.MetadataCollection(brief=brief, padding=None)
+        for row in self.search2(q, footnotes=footnotes):
+            for k,v in row.metadata.items():
+                row.metadata[k] = snippet(v, terms, padding=padding, highlight=highlight)
+
+            result.append(row)
+
+        return result
+
+    def search2(self, q, footnotes='none', limit=None):
+        '''Search the index, returning a generator
+
+        Arguments:
+            q:          search terms (see the module documentation)
+
+            footnotes:  how to treat footnotes: 'include', 'only', or 'none'
+
+            limit:      maximum number of results
+
+        Returns:
+            a generator that provides Metadata objects in order of relevance, as per wbgapi.search2. The
+            metadata property contains the matching fields, and the score property the BM25 score
+        '''
+
+        scores = self._score(q)
+        if not scores:
+            return
+
+        # combine the scores of matching fields
+        hits = {}
+        for doc,score in scores.items():
+            (n, field) = self.docs[doc]
+            concept = self.rows[n].concept.lower()
+            if (concept == 'footnote' and footnotes != 'none') or (concept != 'footnote' and footnotes != 'only'):
+                hits.setdefault(n, []).append((field, score))
+
+        ranked = sorted(hits.items(), key=lambda x: -sum([score for field,score in x[1]]))
+        for n,fields in ranked[:limit]:
+            row = self.rows[n]
+            m = w.Metadata(row.concept, row.id, row.name)
+            m.score = sum([score for field,score in fields])
+            for field,score in fields:
+                m.metadata[field] = row.metadata[field]
+
+            yield m
+
+    def save(self, path):
+        '''Save the index to a file, from which it can be restored with load()
+
+        Arguments:
+            path:       file name
+        '''
+
+        rows = [[row.concept, row.id, row.name, row.metadata] for row in self.rows]
+        with open(path, 'w') as fp:
+            json.dump({'version': _format_version, 'db': self.db, 'rows': rows}, fp)
+
+    def _clauses(self, q):
+        '''Parse a query into a list of clauses: each is a list of terms (a phrase if more than one) and a prefix flag
+        '''
+
+        clauses = []
+        for phrase,word in _clause.findall(q.lower()):
+            prefix = not phrase and word.endswith('*')
+            terms = [_fold(t) for t in _token.findall(phrase or word)]
+            if terms:
+                clauses.append((terms, prefix))
+
+        return clauses
+
+    def _expand(self, prefix):
+
+        if self._terms is None:
+            self._terms = sorted(self.postings.keys())
+
+        i = bisect.bisect_left(self._terms, prefix)
+        terms = []
+        while i < len(self._terms) and self._terms[i].startswith(prefix):
+            terms.append(self._terms[i])
+            i += 1
+
+        return terms
+
+    def _match_terms(self, q):
+        '''Return the set of index terms matched by a query, for highlighting
+        '''
+
+        terms = set()
+        for clause,prefix in self._clauses(q):
+            if prefix:
+                terms.update(self._expand(clause[0]))
+            else:
+                terms.update(clause)
+
+        return terms
+
+    def _score(self, q):
+        '''Return BM25 scores for documents that match all clauses in the query
+        '''
+
+        N = len(self.docs)
+        if N == 0:
+            return {}
+
+        avglen = sum(self.lengths) / N
+        result = None
+        for terms,prefix in self._clauses(q):
+            # frequencies is a list of {doc: tf}, one for each term in the clause
+            if prefix:
+                frequencies = [{doc: len(pos) for doc,pos in self.postings[t].items()} for t in self._expand(terms[0])]
+            elif len(terms) > 1:
+                frequencies = [self._phrase(terms)]
+            else:
+                frequencies = [{doc: len(pos) for doc,pos in self.postings.get(terms[0], {}).items()}]
+
+            scores = {}
+            for tf in frequencies:
+                idf = math.log(1 + (N - len(tf) + 0.5) / (len(tf) + 0.5))
+                for doc,f in tf.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[doc] / avglen)
+                    scores[doc] = scores.get(doc, 0) + idf * f * (self.k1 + 1) / (f + norm)
+
+            if result is None:
+                result = scores
+            else:
+                result = {doc: score + scores[doc] for doc,score in result.items() if doc in scores}
+
+            if not result:
+                return {}
+
+        return result or {}
+
+    def _phrase(self, terms):
+        '''Return {doc: occurrences} for documents containing the terms consecutively
+        '''
+
+        postings = [self.postings.get(t, {}) for t in terms]
+        docs = set(postings[0].keys())
+        for p in postings[1:]:
+            docs &= set(p.keys())
+
+        result = {}
+        for doc in docs:
+            starts = set(postings[0][doc])
+            for i,p in enumerate(postings[1:], 1):
+                starts &= set([pos - i for pos in p[doc]])
+
+            if starts:
+                result[doc] = len(starts)
+
+        return result
+
+def build(db=None, footnotes=False, install=True):
+    '''Download metadata for a database and build a search index
+
+    Arguments:
+        db:         database; pass None to access the global database
+
+        footnotes:  include footnotes. This can take a long time for large databases
+
+        install:    use the index for wbgapi.search and wbgapi.search2 on this database
+
+    Returns:
+        an Index object
+
+    Example:
+        wbgapi.search_index.build()
+        wbgapi.search('population')
+    '''
+
+    if db is None:
+        db = w.db
+
+    index = Index(db=db)
+    if not w.source.has_metadata(db):
+        raise ValueError('database {} has no metadata'.format(db))
+
+    urls = ['sources/{source}/series/all/metadata', 'sources/{source}/country/all/metadata']
+    if footnotes:
+        urls.append('sources/{source}/footnote/all/metadata')
+
+    def get(url):
+        try:
+            return list(w.metadata(url, ['source'], source=str(db)))
+        except w.APIResponseError:
+            # the API returns a malformed response if there is no metadata
+            return []
+        except w.APIError:
+            # not all databases support bulk footnote requests
+            if 'footnote' in url:
+                return []
+
+            raise
+
+    for rows in w.utils.pmap(get, urls):
+        index.add(rows)
+
+    if install:
+        _indexes[str(db)] = index
+
+    return index
+
+def load(path, install=True):
+    '''Load an index saved with Index.save
+
+    Arguments:
+        path:       file name
+
+        install:    use the index for wbgapi.search and wbgapi.search2 on its database
+
+    Returns:
+        an Index object
+    '''
+
+    with open(path, 'r') as fp:
+        data = json.load(fp)
+
+    if data.get('version') != _format_version:
+        raise ValueError('{}: unsupported index format'.format(path))
+
+    rows = []
+    for concept,id,name,metadata in data['rows']:
+        m = w.Metadata(concept, id, name)
+        m.metadata = metadata
+        rows.append(m)
+
+    index = Index(rows, db=data['db'])
+    if install:
+        _indexes[str(index.db)] = index
+
+    return index
+
+def get(db=None):
+    '''Return the index in use for a database
+
+    Arguments:
+        db:         database; pass None to access the global database
+
+    Returns:
+        an Index object, or None if the database has no index
+    '''
+
+    if db is None:
+        db = w.db
+
+    return _indexes.get(str(db))
+
+def remove(db=None):
+    '''Stop using the index for a database, so that wbgapi.search queries the API instead
+
+    Arguments:
+        db:         database; pass None to access the global database
+    '''
+
+    if db is None:
+        db = w.db
+
+    _indexes.pop(str(db), None)
+
+def _fold(term):
+    '''Internal function that folds a lower case word to its singular (approximately), so that queries match
+    plurals and vice versa, e.g., fuels => fuel, economies => economy, taxes => tax. Short words and words
+    ending in ss, us or is (e.g., gas, status, analysis) are unchanged
+    '''
+
+    if len(term) <= 3 or term[-1] != 's':
+        return term
+
+    if term.endswith('ies') and len(term) > 4:
+        return term[:-3] + 'y'
+
+    if term.endswith(('sses', 'xes', 'zes', 'ches', 'shes')):
+        return term[:-2]
+
+    if term.endswith(('ss', 'us', 'is')):
+        return term
+
+    return term[:-1]
+
+def snippet(text, terms, padding=80, highlight=True):
+    '''Return the part of the text surrounding the first word in terms, optionally with matching words highlighted
+
+    Arguments:
+        text:       the text
+
+        terms:      a set of lower case words, as folded by the index
+
+        padding:    approximate number of characters to include on either side of the first match. None
+                    returns the entire string
+
+        highlight:  mark matching words with asterisks
+
+    Returns:
+        a string
+    '''
+
+    matches = [m for m in _token.finditer(text) if _fold(m.group(0).lower()) in terms]
+    if not matches:
+        return text
+
+    start, end = 0, len(text)
+    if padding is not None:
+        # snap the window to word boundaries
+        start = max(0, matches[0].start() - padding)
+        end = min(len(text), matches[0].end() + padding)
+        while start > 0 and text[start-1].isalnum():
+            start -= 1
+
+        while end < len(text) and text[end].isalnum():
+            end += 1
+
+    s, last = '', start
+    for m in matches:
+        if m.start() >= start and m.end() <= end:
+            s += text[last:m.start()] + ('*{}*'.format(m.group(0)) if highlight else m.group(0))
+            last = m.end()
+
+    s += text[last:end]
+    return ('...' if start > 0 else '') + s + ('...' if end < len(text) else '')
@@ -3,8 +3,9 @@
 '''
 
 import wbgapi as w
+from . import utils
 
-def fetch(id,economies=[],time=[],db=None):
+def fetch(id,economies=[],time=[],db=None,fields=None):
     '''Return metadata for specified series
 
     Arguments:
@@ -18,6 +19,9 @@ def fetch(id,economies=[],time=[],db=None):
 
         db:         database; pass None to access the global database
 
+        fields:     optional name or list of series metadata fields to return, e.g., 'Longdefinition'.
+                    Other fields are discarded as they are read. Pass None for all fields
+
     Returns:
         A generator object which generates Metadata objects. If series/economy or series/time
         metadata are requested they will be stored on the 'economies' and 'time' properties
@@ -25,19 +29,9 @@ def fetch(id,economies=[],time=[],db=None):
     Examples:
         for meta = wbgapi.series.metadata.fetch(['SP.POP.TOTL', 'NY.GDP.PCAP.CD']):
             print(meta)
-    '''
 
-    if type(economies) is str:
-        if economies == 'all':
-            economies = [row['id'] for row in w.economy.list()]
-        else:
-            economies = [economies]
-
-    if type(time) is str:
-        if time == 'all':
-            time = [row['id'] for row in w.time.list()]
-        else:
-            time = [time]
+        definitions = {meta.id: meta.metadata.get('Longdefinition') for meta in wbgapi.series.metadata.fetch('all', fields='Longdefinition')}
+    '''
 
     if db is None:
         db = w.db
@@ -45,30 +39,38 @@ def fetch(id,economies=[],time=[],db=None):
     if not w.source.has_metadata(db):
         return None
 
-    for row in w.metadata('sources/{source}/series/{series}/metadata', ['series'], source=db, series=w.queryParam(id, 'series', db=db)):
+    economies = utils.ids(economies, 'economy', db)
+    time = utils.ids(time, 'time', db)
+
+    rows = list(w.metadata('sources/{source}/series/{series}/metadata', ['series'], fields=fields, source=db, series=w.queryParam(id, 'series', db=db)))
+    if not rows:
+        return
+
+    # Country-Series and Series-Time metadata are requested for all series at once, many keys
+    # per request (see wbgapi._metadata_chunks)
+    cs, st = {}, {}
+    if economies:
+        for (e,s),v in w.economy.metadata.country_series(economies, [row.id for row in rows], db=db).items():
+            cs.setdefault(s, {})[e] = v
+
+    if time:
+        keys = ';'.join(['{}~{}'.format(row.id,elem) for row in rows for elem in time])
+        for row2 in w._metadata_chunks('sources/{source}/Series-Time/{series}/metadata', 'series', concepts='Series-Time', fields='Series-Time', source=db, series=keys):
+            (s, t) = row2.id.split('~')
+            if 'Series-Time' in row2.metadata:
+                st.setdefault(s, {})[t] = row2.metadata['Series-Time']
+
+    for row in rows:
         if economies:
-            row.economies = {}
-            # requests for non-existing data throw malformed responses so we must catch for them
-            try:
-                cs = ';'.join(['{}~{}'.format(elem,row.id) for elem in economies])
-                for row2 in w.metadata('sources/{source}/Country-Series/{series}/metadata', ['series'], source=db, series=cs):
-                    row.economies[row2.id.split('~')[0]] = row2.metadata['Country-Series']
-            except:
-                pass
+            row.economies = cs.get(row.id, {})
 
         if time:
-            row.time = {}
-            try:
-                st = ';'.join(['{}~{}'.format(row.id,elem) for elem in time])
-                for row2 in w.metdata('sources/{source}/Series-Time/{series}/metadata', ['series'], source=db, series=st):
-                    row.time[row2.id.split('~')[1]] = row2.metadata['Series-Time']
-            except:
-                pass
+            row.time = st.get(row.id, {})
 
         yield row
 
 
-def get(id,economies=[],time=[],db=None):
+def get(id,economies=[],time=[],db=None,fields=None):
     '''Retrieve a single metadata record
 
     Arguments:
@@ -80,6 +82,8 @@ def get(id,economies=[],time=[],db=None):
 
         db:         database; pass None to access the global database
 
+        fields:     optional name or list of series metadata fields to return
+
     Returns:
         A Metadata object.  If series/economy or series/time metadata are
         requested they will be stored on the 'economies' and 'time' properties
@@ -88,5 +92,48 @@ def get(id,economies=[],time=[],db=None):
         print(wbgapi.series.metadata.get('SP.POP.TOTL'))
     '''
     
-    for row in fetch(id, economies, time, db):
+    for row in fetch(id, economies, time, db, fields):
         return row
+
+def DataFrame(id, economies=[], time=[], db=None, fields=None):
+    '''Return metadata for specified series as a tidy pandas DataFrame, with one row per field
+
+    Arguments:
+        id:         a series identifier or list-like
+
+        economies:  optional list of economies for which to include series-economy metadata
+
+        time:       optional list of time identifiers for which to include series-time metadata
+
+        db:         database; pass None to access the global database
+
+        fields:     optional name or list of series metadata fields to return
+
+    Returns:
+        a pandas DataFrame with columns for series, economy, time, field and value. The economy
+        column is populated only for Country-Series metadata, and time only for Series-Time metadata
+
+    Example:
+        df = wbgapi.series.metadata.DataFrame(['SP.POP.TOTL', 'NY.GDP.PCAP.CD'], economies=['BRA', 'ARG'])
+        notes = df[df['field']=='Country-Series']
+    '''
+
+    backend = w.frames.get()
+    columns = ['series', 'economy', 'time', 'field', 'value']
+    data = {k: [] for k in columns}
+
+    def append(series, economy, time, field, value):
+        for k,v in zip(columns, [series, economy, time, field, value]):
+            data[k].append(v)
+
+    for row in fetch(id, economies, time, db, fields):
+        for k,v in row.metadata.items():
+            append(row.id, None, None, k, v)
+
+        for k,v in getattr(row, 'economies', {}).items():
+            append(row.id, k, None, 'Country-Series', v)
+
+        for k,v in getattr(row, 'time', {}).items():
+            append(row.id, None, k, 'Series-Time', v)
+
+    return backend.flat(data, columns)
@@ -91,6 +91,13 @@ def concepts(db=None):
     if c is not None:
         return c
 
+    c = _concepts[db] = _fetch_concepts(db)
+    return c
+
+def _fetch_concepts(db):
+    '''Internal function that retrieves concepts from the API (see concepts)
+    '''
+
     url = 'sources/{}/concepts'.format(db)
     c = {}
     for row in w.fetch(url, concepts=True):
@@ -109,7 +116,6 @@ def concepts(db=None):
         id = re.sub(r'[\-\.,:!]', '_', id)  # neutralize special characters
         c[id] = {'key': key, 'value': row['value']}
 
-    _concepts[db] = c
     return c
 
 def features(concept, id='all', db=None):
@@ -180,12 +186,17 @@ def has_metadata(db=None):
     global _metadata_flags
     m = _metadata_flags.get(db)
     if m is None:
-        src = get(db)
-        m = src.get('metadataavailability','').upper() == 'Y'
-        _metadata_flags[db] = m
+        m = _metadata_flags[db] = _fetch_metadata_flag(db)
 
     return m
 
+def _fetch_metadata_flag(db):
+    '''Internal function that retrieves the metadata flag from the API (see has_metadata)
+    '''
+
+    src = get(db)
+    return src.get('metadataavailability','').upper() == 'Y'
+
 def info(id='all', q=None):
     '''Print a user report of databases
 
@@ -11,10 +11,16 @@ e.g., 'YR2015,' '2015' and 2015 are acceptable.
 import wbgapi as w
 from . import utils
 import builtins
+import re
+
+pd = utils.lazy_import('pandas')
 
 # this is an array of reverse value lookup tables
 _time_values = {}
 
+# recognizes annual, quarterly and monthly time keys and values, e.g., YR2015, 2015, 2015Q3, 2015M07
+_time_expr = re.compile(r'^(?:YR)?(\d{4})(?:([QM])(\d{1,2}))?$', re.IGNORECASE)
+
 def list(id='all', q=None, db=None):
     '''Return a list of time elements in the current database
 
@@ -74,14 +80,101 @@ def periods(db=None):
 
     v = _time_values.get(db)
     if v is None:
-        v = {}
-        for row in w.source.features('time', 'all', db=db):
-            v[row['value']] = row['id']
+        v = _time_values[db] = _fetch_periods(db)
+
+    return v
+
+def _fetch_periods(db):
+    '''Internal function that retrieves time features from the API (see periods)
+    '''
 
-        _time_values[db] = v
+    v = {}
+    for row in w.source.features('time', 'all', db=db):
+        v[row['value']] = row['id']
 
     return v
 
+def convert(keys, to='int', db=None):
+    '''Convert a list-like of time keys (e.g., a column of results) to numeric values or pandas periods.
+    This is used internally to build DataFrames, but may be useful for other purposes.
+
+    Arguments:
+        keys:   a list-like of time keys or values, e.g., ['YR2015', 'YR2016'] or ['2015Q3', '2015Q4']
+
+        to:     'int' to convert annual keys to integers, leaving others as-is; or 'period' to convert
+                all keys to pandas periods (annual, quarterly or monthly)
+
+        db:     database; pass None to access the global database
+
+    Returns:
+        a list for to='int', or a pandas PeriodIndex for to='period'. Missing keys are returned
+        as None or NaT respectively
+
+    Example:
+        wbgapi.time.convert(['YR2015', 'YR2016'])                # returns [2015, 2016]
+
+        wbgapi.time.convert(['2015Q3', '2015Q4'], to='period')   # returns PeriodIndex(['2015Q3', '2015Q4'], dtype='period[Q-DEC]')
+
+    Notes:
+        Each distinct key is parsed only once, so this is efficient for long columns. Keys that aren't in
+        a recognized format are looked up via periods()
+    '''
+
+    if to not in ['int', 'period']:
+        raise ValueError('to must be \'int\' or \'period\'')
+
+    if to == 'period' and not pd:
+        raise ModuleNotFoundError('you must install pandas to use this feature')
+
+    # find distinct keys, and the position of each key in that list. Missing keys have a position of -1,
+    # which takes the last element, so a None/NaT is appended to the converted keys below
+    if pd:
+        (codes, uniques) = pd.factorize(pd.Series(keys, dtype=object))
+        uniques = builtins.list(uniques)
+    else:
+        positions = {}
+        codes = [-1 if k is None else positions.setdefault(k, len(positions)) for k in keys]
+        uniques = builtins.list(positions.keys())
+
+    values = None
+    parsed = []
+    for k in uniques:
+        m = _time_expr.match(str(k))
+        if m is None:
+            # look up the key's value and try that
+            if values is None:
+                values = {v:k for k,v in periods(db).items()}
+
+            m = _time_expr.match(values.get(k, ''))
+
+        parsed.append(m.groups() if m else None)
+
+    if to == 'int':
+        converted = [int(p[0]) if p and p[1] is None else k for k,p in zip(uniques, parsed)] + [None]
+        if pd:
+            return pd.Series(converted, dtype=object).take(codes).tolist()
+
+        return [converted[n] for n in codes]
+
+    converted = []
+    for k,p in zip(uniques, parsed):
+        if p is None:
+            raise ValueError('{} is not a recognized time period'.format(k))
+
+        (year, freq, n) = p
+        if freq is None:
+            converted.append(pd.Period(year=int(year), freq='Y'))
+        elif freq.upper() == 'Q':
+            converted.append(pd.Period(year=int(year), quarter=int(n), freq='Q'))
+        else:
+            converted.append(pd.Period(year=int(year), month=int(n), freq='M'))
+
+    if len(set([p.freqstr for p in converted])) > 1:
+        raise ValueError('time periods must all have the same frequency')
+
+    freq = converted[0].freq if converted else 'Y'
+    return pd.PeriodIndex(converted + [pd.NaT], freq=freq).take(codes)
+
 def info(id='all', q=None, db=None):
     '''Print a user report of time features
 
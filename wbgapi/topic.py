@@ -6,6 +6,8 @@ import wbgapi as w
 from . import utils
 import builtins
 
+_members = {}       # topic members, keyed by topic and database
+
 def list(id='all', q=None):
     '''Return a list of topics
 
@@ -56,13 +58,16 @@ def members(id):
     Returns:
         a set object of series identifiers
 
+    Notes:
+        members are cached, so repeated calls require no API requests
     '''
 
-    e = set()
-    for row in w.fetch('topic/{}/indicator'.format(w.queryParam(id)), {'source': w.db}):
-        e.add(row['id'])
+    key = (w.queryParam(id), str(w.db))
+    e = _members.get(key)
+    if e is None:
+        e = _members[key] = {row['id'] for row in w.fetch('topic/{}/indicator'.format(key[0]), {'source': w.db})}
 
-    return e
+    return set(e)
 
 def Series(id='all', q=None, name='TopicName'):
     '''Return a pandas Series by calling list
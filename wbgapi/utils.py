@@ -1,5 +1,8 @@
 
 import re
+import sys
+import importlib
+import wbgapi as w
 
 def qget(q):
     '''Returns the lower-case search string from text along with possible options. This is used internally
@@ -50,3 +53,118 @@ def qmatch(q, text, fullSearch=True):
 
     return q in text.lower()
 
+def pmap(func, items, max_workers=None):
+    '''Like map(), but calls func concurrently in a thread pool. This is used internally for concurrent API requests
+
+    Arguments:
+        func:           function to call for each item
+
+        items:          an iterable
+
+        max_workers:    maximum number of threads. Pass None to use wbgapi.max_workers
+
+    Returns:
+        a list of results in the same order as items
+    '''
+
+    items = list(items)
+    if max_workers is None:
+        max_workers = w.max_workers
+
+    if len(items) < 2 or max_workers < 2:
+        return list(map(func, items))
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+class LazyModule():
+    '''A stand-in for a module that is imported the first time one of its attributes is accessed
+    (see lazy_import)
+    '''
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._missing = False
+
+    def _load(self):
+        if self._module is None and not self._missing:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError:
+                self._missing = True
+
+        return self._module
+
+    def __bool__(self):
+        # False if the module isn't installed
+        return self._load() is not None
+
+    def __getattr__(self, name):
+        module = self._load()
+        if module is None:
+            raise ModuleNotFoundError('you must install {} to use this feature'.format(self._name))
+
+        return getattr(module, name)
+
+    def __repr__(self):
+        return '<lazy module {}>'.format(self._name)
+
+def lazy_import(name):
+    '''Return a stand-in for a module that defers the import until it's used. This keeps
+    "import wbgapi" fast, since packages like pandas take much longer to import than wbgapi itself
+
+    Arguments:
+        name:       module name
+
+    Returns:
+        a LazyModule object. Test it for truth to see if the module is installed
+
+    Example:
+        pd = lazy_import('pandas')
+        if not pd:
+            raise ModuleNotFoundError('you must install pandas to use this feature')
+
+        df = pd.DataFrame()
+    '''
+
+    return LazyModule(name)
+
+def imported(name):
+    '''Test whether a module has already been imported, without importing it. For instance,
+    an object can't be a pandas Series if pandas hasn't been imported
+    '''
+
+    return name in sys.modules
+
+def ids(arg, concept, db=None):
+    '''Return a list of identifiers for a concept. This is used internally where a function needs
+    to iterate over the individual elements of a dimension, e.g., to build metadata keys
+
+    Arguments:
+        arg:        a record identifier, list-like of identifiers, or 'all' (see queryParam)
+
+        concept:    concept for the arguments passed
+
+        db:         database; pass None to access the global database
+
+    Returns:
+        a list of identifiers, or an empty list if arg is empty
+
+    Example:
+        ids(['FRA', 'DEU'], 'economy')     # ['FRA', 'DEU']
+        ids(range(2010, 2012), 'time')     # ['YR2010', 'YR2011']
+    '''
+
+    if db is None:
+        db = w.db
+
+    if arg is None or (type(arg) is not int and type(arg) is not str and len(arg) == 0):
+        return []
+
+    arg = w.queryParam(arg, concept, db=db)
+    if arg == 'all':
+        return [row['id'] for row in w.source.features(concept, arg, db=db)]
+
+    return arg.split(';') if arg else []